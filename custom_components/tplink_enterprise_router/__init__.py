@@ -3,12 +3,26 @@ import logging
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
 
-from .const import (DOMAIN, PLATFORMS)
+from .const import (DOMAIN, PLATFORMS, SNAPSHOT_STORAGE_KEY, DATA_SCHEDULER)
 from .coordinator import TPLinkEnterpriseRouterCoordinator
+from .roaming import async_remove_roaming
+from .scheduler import PollScheduler
+from .services import async_setup_services
 
 _LOGGER = logging.getLogger(__name__)
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """ Register domain services """
+    async_setup_services(hass)
+
+    return True
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """ Check register status """
     if entry.entry_id in hass.data.get(DOMAIN, {}):
@@ -17,14 +31,42 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     """ Register coordinator """
     _coordinator = TPLinkEnterpriseRouterCoordinator(hass, entry)
-    await _coordinator.async_config_entry_first_refresh()
+    restored = (
+        entry.data.get("enable_snapshot_restore", True)
+        and await _coordinator.async_restore_snapshot()
+    )
+    if not restored:
+        try:
+            await _coordinator.async_config_entry_first_refresh()
+        except Exception:
+            await _coordinator.client.close()
+            raise
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = _coordinator
+    await _coordinator.roaming.async_load()
+
+    """ Register to the shared poll scheduler """
+    scheduler: PollScheduler = hass.data[DOMAIN].get(DATA_SCHEDULER)
+    if scheduler is None:
+        scheduler = hass.data[DOMAIN][DATA_SCHEDULER] = PollScheduler(hass)
+    scheduler.async_register(_coordinator)
 
     """ Forward setup """
     await hass.async_create_task(
         hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     )
 
+    """ Entities were created from the restored snapshot, pull live status in background """
+    if restored:
+        entry.async_create_background_task(
+            hass, scheduler.async_poll(_coordinator), f"{DOMAIN} {entry.entry_id} first live poll"
+        )
+
+    entry.async_on_unload(_coordinator.profiler.async_stop)
+
+    """ SSID schedule """
+    await _coordinator.ssid_schedule.async_load()
+    entry.async_on_unload(_coordinator.ssid_schedule.async_stop)
+
     """ Syslog event handler """
     if entry.data.get("enable_syslog_notify_event", False):
         remove_listener = hass.bus.async_listen(
@@ -43,6 +85,14 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     """ Unload the data """
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        hass.data[DOMAIN][DATA_SCHEDULER].async_unregister(entry.entry_id)
+        _coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await _coordinator.client.close()
+
+    return True
 
-    return True
\ No newline at end of file
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """ Remove the persisted status snapshot, SSID schedule and roaming history """
+    await Store(hass, version=1, key=SNAPSHOT_STORAGE_KEY.format(entry_id=entry.entry_id)).async_remove()
+    await Store(hass, version=1, key=f"{DOMAIN}_{entry.entry_id}_ssid_schedule").async_remove()
+    await async_remove_roaming(hass, entry.entry_id)
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""Base entity of the per-AP devices."""
+from __future__ import annotations
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.device_registry import CONNECTION_NETWORK_MAC
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN
+from .coordinator import TPLinkEnterpriseRouterCoordinator
+
+
+def ap_device_identifier(mac: str) -> tuple[str, str]:
+    return DOMAIN, f"ap_{mac}"
+
+
+@callback
+def async_remove_ap_device(hass: HomeAssistant, entry: ConfigEntry, mac: str) -> None:
+    """ Drop the device of an AP that left the AP table, its remaining entities go with it """
+    registry = dr.async_get(hass)
+    device = registry.async_get_device({ap_device_identifier(mac)})
+    if device is not None:
+        registry.async_update_device(device.id, remove_config_entry_id=entry.entry_id)
+
+
+class TPLinkEnterpriseRouterApEntity(CoordinatorEntity[TPLinkEnterpriseRouterCoordinator]):
+    """Entity bound to one AP of the AP table, looked up by MAC on every update."""
+
+    def __init__(self, coordinator: TPLinkEnterpriseRouterCoordinator, mac: str, platform: str, key: str) -> None:
+        super().__init__(coordinator)
+
+        self.mac = mac
+        slug = mac.lower().replace("-", "").replace(":", "")
+        self.entity_id = f"{platform}.{DOMAIN}_ap_{slug}_{key}_{coordinator.unique_id}"
+        self._attr_unique_id = f"{DOMAIN}_ap_{mac}_{key}_{coordinator.unique_id}"
+        self._attr_translation_key = key
+        self._attr_has_entity_name = True
+
+        self._attr_device_info = DeviceInfo(
+            identifiers={ap_device_identifier(mac)},
+            connections={(CONNECTION_NETWORK_MAC, mac)},
+            manufacturer="TP-Link",
+            model="AP",
+            name=self.ap.get("entry_name") or mac,
+        )
+        if coordinator.device_info and coordinator.device_info.get("identifiers"):
+            self._attr_device_info["via_device"] = next(iter(coordinator.device_info["identifiers"]))
+
+    @property
+    def ap(self) -> dict:
+        return self.coordinator.ap_index.get(self.mac) or {}
+
+    @property
+    def available(self) -> bool:
+        return super().available and self.coordinator.ap_index.get(self.mac) is not None
@@ -0,0 +1,122 @@
+"""Rolling AP reboot with online confirmation between batches."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import (
+    DOMAIN,
+    AP_REBOOT_POLL_INTERVAL,
+    AP_REBOOT_OFFLINE_GRACE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RollingApReboot:
+    """Reboot APs batch by batch, waiting for each batch to report online before the next one."""
+
+    def __init__(self, hass: HomeAssistant, coordinator) -> None:
+        self.hass = hass
+        self.coordinator = coordinator
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    async def async_run(
+            self,
+            ap_ids: list[str],
+            batch_size: int,
+            online_timeout: int,
+            max_failures: int,
+            reboot_router: bool = False,
+    ) -> bool:
+        if self._running:
+            raise HomeAssistantError(f"AP reboot already running on {self.coordinator.host}")
+
+        self._running = True
+        try:
+            return await self._async_run(ap_ids, batch_size, online_timeout, max_failures, reboot_router)
+        finally:
+            self._running = False
+
+    async def _async_run(self, ap_ids, batch_size, online_timeout, max_failures, reboot_router) -> bool:
+        batches = [ap_ids[i:i + batch_size] for i in range(0, len(ap_ids), batch_size)]
+        """ APs already offline still get the reboot but are not waited for, they would never come back """
+        index = self.coordinator.ap_index
+        skipped = [ap_id for ap_id in ap_ids if not index.online(ap_id)]
+        failed = []
+
+        for index, batch in enumerate(batches, start=1):
+            self._fire("batch_started", batch=index, batches=len(batches), aps=self._names(batch))
+            try:
+                await self.coordinator.client.reboot_ap(batch)
+                waited = [ap_id for ap_id in batch if ap_id not in skipped]
+                offline = await self._async_wait_online(waited, online_timeout) if waited else []
+            except Exception as e:
+                _LOGGER.error("AP reboot batch %s on %s failed: %s", index, self.coordinator.host, e)
+                offline = [ap_id for ap_id in batch if ap_id not in skipped]
+
+            failed.extend(offline)
+            self._fire(
+                "batch_finished", batch=index, batches=len(batches),
+                aps=self._names(batch), failed=self._names(offline),
+            )
+
+            if len(failed) > max_failures:
+                self._fire("aborted", batch=index, batches=len(batches), failed=self._names(failed))
+                return False
+
+        if reboot_router:
+            """ Router goes last, once every AP is back """
+            self._fire("router_reboot", batches=len(batches), failed=self._names(failed))
+            await self.coordinator.reboot()
+
+        self._fire(
+            "completed", batches=len(batches), failed=self._names(failed), skipped=self._names(skipped),
+        )
+        return True
+
+    async def _async_wait_online(self, batch: list[str], timeout: int) -> list[str]:
+        """ Return the APs of the batch that did not come back before the timeout """
+        started = time.monotonic()
+        went_down = set()
+
+        while True:
+            await asyncio.sleep(AP_REBOOT_POLL_INTERVAL)
+            elapsed = time.monotonic() - started
+
+            try:
+                await self.coordinator.refresh_section("apmng_set")
+            except Exception as e:
+                _LOGGER.debug("AP table read failed during reboot of %s: %s", batch, e)
+                pending = batch
+            else:
+                index = self.coordinator.ap_index
+                went_down.update(ap_id for ap_id in batch if not index.online(ap_id))
+
+                """ An AP is back once it was seen offline, or the grace period passed without catching it """
+                pending = [
+                    ap_id for ap_id in batch
+                    if not index.online(ap_id) or (ap_id not in went_down and elapsed < AP_REBOOT_OFFLINE_GRACE)
+                ]
+
+            if not pending or elapsed >= timeout:
+                return pending
+
+    def _names(self, ap_ids: list[str]) -> list[str]:
+        by_entry_id = self.coordinator.ap_index.by_entry_id
+        return [by_entry_id.get(ap_id, {}).get("entry_name", ap_id) for ap_id in ap_ids]
+
+    def _fire(self, stage: str, **data) -> None:
+        self.hass.bus.async_fire(f"{DOMAIN}_ap_reboot_progress", {
+            "entry_id": self.coordinator.entry.entry_id,
+            "stage": stage,
+            **data,
+        })
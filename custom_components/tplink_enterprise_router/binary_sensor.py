@@ -0,0 +1,45 @@
+"""Component providing per-AP binary sensors."""
+from __future__ import annotations
+
+from homeassistant.components.binary_sensor import BinarySensorDeviceClass, BinarySensorEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .ap_entity import TPLinkEnterpriseRouterApEntity, async_remove_ap_device
+from .const import DOMAIN
+from .coordinator import TPLinkEnterpriseRouterCoordinator
+from .dynamic_entity import async_track_dynamic_entities
+from .index import AP_ONLINE_STATUS
+
+
+async def async_setup_entry(
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        async_add_entities: AddEntitiesCallback,
+) -> None:
+    if not entry.data.get("enable_ap_entities", False):
+        return
+
+    coordinator: TPLinkEnterpriseRouterCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    """ The online sensor owns the AP device, the device goes away with it """
+    async_track_dynamic_entities(
+        coordinator,
+        entry,
+        async_add_entities,
+        keys=lambda: coordinator.ap_index.macs,
+        factory=lambda mac: [TPLinkApOnlineBinarySensor(coordinator, mac)],
+        on_removed=lambda mac: async_remove_ap_device(hass, entry, mac),
+    )
+
+
+class TPLinkApOnlineBinarySensor(TPLinkEnterpriseRouterApEntity, BinarySensorEntity):
+    _attr_device_class = BinarySensorDeviceClass.CONNECTIVITY
+
+    def __init__(self, coordinator: TPLinkEnterpriseRouterCoordinator, mac: str) -> None:
+        super().__init__(coordinator, mac, "binary_sensor", "ap_online")
+
+    @property
+    def is_on(self) -> bool:
+        return self.ap.get("status") == AP_ONLINE_STATUS
@@ -0,0 +1,117 @@
+"""Per router circuit breaker, so a router that stopped answering does not cost a timeout on every call."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections.abc import Awaitable, Callable
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_PROBE_INTERVAL, CIRCUIT_PROBE_MAX_INTERVAL
+from .errors import RouterRequestError, RouterUnavailableError
+from .metrics import PollMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Open after `threshold` consecutive unanswered requests, calls then fail right away.
+
+    While open, a background task probes the router with a growing, jittered interval and closes
+    the circuit as soon as it answers. Failures where the router did answer (HTTP or API errors)
+    never open it.
+    """
+
+    def __init__(
+            self,
+            hass: HomeAssistant,
+            host: str,
+            probe: Callable[[], Awaitable[None]],
+            metrics: PollMetrics,
+            threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+    ) -> None:
+        self.hass = hass
+        self.host = host
+        self.metrics = metrics
+        self.threshold = threshold
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.probes = 0
+        self._probe = probe
+        self._probe_task: asyncio.Task | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def check(self, operation: str) -> None:
+        if self.is_open:
+            self.metrics.increment("circuit_rejected")
+            raise RouterUnavailableError(
+                self.host, operation, f"router unreachable for {time.monotonic() - self.opened_at:.0f}s"
+            )
+
+    @callback
+    def record_success(self) -> None:
+        self.failures = 0
+
+    @callback
+    def record_failure(self, error: RouterRequestError) -> None:
+        if not error.trips_circuit:
+            return
+
+        self.failures += 1
+        if self.failures >= self.threshold and not self.is_open:
+            self._open(error)
+
+    @callback
+    def async_stop(self) -> None:
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            self._probe_task = None
+
+    def as_dict(self) -> dict:
+        return {
+            "state": "open" if self.is_open else "closed",
+            "consecutive_failures": self.failures,
+            "open_for": time.monotonic() - self.opened_at if self.is_open else None,
+            "probes": self.probes,
+        }
+
+    def _open(self, error: RouterRequestError) -> None:
+        _LOGGER.warning("%s stopped answering, pausing requests until it is reachable again: %s", self.host, error)
+        self.opened_at = time.monotonic()
+        self.metrics.increment("circuit_open")
+        self._probe_task = self.hass.async_create_background_task(
+            self._async_probe(), f"tplink_enterprise_router circuit probe {self.host}"
+        )
+
+    def _close(self) -> None:
+        _LOGGER.info("%s is reachable again after %.0fs", self.host, time.monotonic() - self.opened_at)
+        self.opened_at = None
+        self.failures = 0
+
+    async def _async_probe(self) -> None:
+        interval = CIRCUIT_PROBE_INTERVAL
+        try:
+            while True:
+                await asyncio.sleep(interval * random.uniform(0.5, 1.5))
+                self.probes += 1
+                try:
+                    await self._probe()
+                except RouterRequestError as e:
+                    if e.trips_circuit:
+                        interval = min(interval * 2, CIRCUIT_PROBE_MAX_INTERVAL)
+                        continue
+                except Exception:
+                    """ A bug must not leave the circuit open for good """
+                    _LOGGER.exception("Unexpected error probing %s", self.host)
+                    interval = min(interval * 2, CIRCUIT_PROBE_MAX_INTERVAL)
+                    continue
+
+                self._close()
+                return
+        finally:
+            self._probe_task = None
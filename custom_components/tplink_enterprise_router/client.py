@@ -1,32 +1,177 @@
+import asyncio
 import logging
+import random
+import time
+from collections.abc import Callable
 from urllib.parse import unquote
-from aiohttp import ClientTimeout
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, TraceConfig
 
 from homeassistant.exceptions import HomeAssistantError, IntegrationError, ConfigEntryAuthFailed
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util.ssl import client_context
+
+from .circuit import CircuitBreaker
+from .codec import JsonCodec, get_codec
+from .errors import RouterApiError, RouterHttpError, RouterRequestError, classify_error
+from .metrics import PollMetrics
+from .stream import StreamingRecordDecoder
+from .const import (
+    DEFAULT_REQUEST_TIMEOUTS,
+    DEDICATED_SESSION_LIMIT_PER_HOST,
+    DEDICATED_SESSION_KEEPALIVE,
+    DEDICATED_SESSION_DNS_TTL,
+    STREAM_CHUNK_SIZE,
+    RETRYABLE_OPERATIONS,
+    REQUEST_RETRIES,
+    REQUEST_RETRY_BACKOFF,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+HEADERS = {
+    "Content-Type": "application/json",
+}
+
+HOST_PICKER_FIELDS = ('mac', 'hostname', 'ip', 'ssid', 'type')
+HOST_FIELDS = ('connect_date', 'rssi', 'ip', 'hostname', 'connect_time', 'mac', 'type', 'ssid', 'freq_name', 'ap_name')
+AP_FIELDS = ('entry_name', 'entry_id', 'mac', 'status', 'led', 'group_id')
+
+STATUS_QUERIES = {
+    "host_management": {
+        "name": "host_count_info",
+        "table": "host_info"
+    },
+    "system": {
+        "name": [
+            "cpu_usage",
+            "mem_usage",
+            "device_info"
+        ]
+    },
+    "online_check": {"table": "state", "name": "state"},
+    # "apmng_status": {
+    #     "name": "apmng_status"
+    # },
+    "apmng_set": {
+        "table": "ap_list",
+        "filter": [
+            {"group_id": "0", "ap_role": "re_all"}, {"group_id": "0"}
+        ],
+        "para": {"start": 0, "end": 499}
+    },
+    "apmng_wserv": {
+        "table": "wlan_serv", "filter": {"network_type": ["1", "2", "3"]},
+        "para": {"start": 0, "end": 9}
+    }
+}
+
+
+class CleanRecords(list):
+    """Table records already unwrapped and cleaned while the response was streamed."""
+
+    local_ip = None
+
+
+def _clean_host(host: dict) -> dict:
+    return {key: unquote(host.get(key, '')) for key in HOST_FIELDS if key in host}
+
+
+def _clean_ap(ap: dict) -> dict:
+    return {key: unquote(ap[key]) for key in AP_FIELDS if key in ap}
+
 
 class TPLinkEnterpriseRouterClient:
-    def __init__(self, hass, host, username, password):
+    def __init__(self, hass, host, username, password, dedicated_session=False, timeouts=None, metrics=None,
+                 streaming_decode=False, codec: JsonCodec | None = None):
         self.host = host
+        self.streaming_decode = streaming_decode
+        self.codec = codec or get_codec()
+        """ Constant queries are encoded once instead of on every poll """
+        self._status_body = self.codec.dumps({"method": "get", **STATUS_QUERIES})
+        self._section_bodies = {
+            section: self.codec.dumps({"method": "get", section: query}) for section, query in STATUS_QUERIES.items()
+        }
+        self._hosts_body = self.codec.dumps({"method": "get", "host_management": {"table": "host_info"}})
         self.username = username
         self.password = password
         self.token = None
-        self._session = async_get_clientsession(hass)
+        self.metrics = metrics or PollMetrics()
+        self.circuit = CircuitBreaker(hass, host, self._probe, self.metrics)
+        self._logins = 0
+        self._auth_lock = asyncio.Lock()
+        self._timeouts = {
+            operation: ClientTimeout(total=seconds)
+            for operation, seconds in {**DEFAULT_REQUEST_TIMEOUTS, **(timeouts or {})}.items()
+        }
+        self._requests = 0
+        self._connections_created = 0
+        self._connections_reused = 0
+
+        """ Dedicated session keeps connections to this router alive between polls """
+        if dedicated_session:
+            self._session = self._create_session()
+            self._owns_session = True
+        else:
+            self._session = async_get_clientsession(hass)
+            self._owns_session = False
+
+    def _create_session(self) -> ClientSession:
+        trace_config = TraceConfig()
+        trace_config.on_connection_create_end.append(self._on_connection_created)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reused)
+
+        connector = TCPConnector(
+            limit_per_host=DEDICATED_SESSION_LIMIT_PER_HOST,
+            keepalive_timeout=DEDICATED_SESSION_KEEPALIVE,
+            use_dns_cache=True,
+            ttl_dns_cache=DEDICATED_SESSION_DNS_TTL,
+            # one context per router, so TLS settings and CA store are loaded once
+            ssl=client_context() if self.host.startswith("https") else False,
+        )
+
+        return ClientSession(connector=connector, trace_configs=[trace_config])
+
+    async def _on_connection_created(self, session, context, params) -> None:
+        self._connections_created += 1
+
+    async def _on_connection_reused(self, session, context, params) -> None:
+        self._connections_reused += 1
+
+    @property
+    def connection_stats(self) -> dict:
+        connections = self._connections_created + self._connections_reused
+
+        return {
+            "dedicated_session": self._owns_session,
+            "requests": self._requests,
+            "connections_created": self._connections_created,
+            "connections_reused": self._connections_reused,
+            "reuse_ratio": self._connections_reused / connections if connections else None,
+            "circuit": self.circuit.as_dict(),
+        }
+
+    async def close(self) -> None:
+        self.circuit.async_stop()
+        if self._owns_session and not self._session.closed:
+            await self._session.close()
 
     async def authenticate(self) -> None:
         try:
             json = await self.request(
                 self.host,
                 {"method": "do", "login": {"username": self.username, "password": self.password}},
+                "login",
             )
 
             if json['error_code'] != 0:
                 raise ConfigEntryAuthFailed(f"Failed to authenticate, check host, username and password")
 
             self.token = json['stok']
+            if self._logins:
+                self.metrics.increment("reauth")
+            self._logins += 1
+        except RouterRequestError:
+            raise
         except Exception as e:
             raise IntegrationError(f"Cannot connect router {e}")
 
@@ -34,13 +179,13 @@ class TPLinkEnterpriseRouterClient:
         if self.token is None:
             return
 
-        await self.request(f"{self.host}/stok={self.token}/ds", {"method": "do", "system": {"logout": None}})
+        await self.request(f"{self.host}/stok={self.token}/ds", {"method": "do", "system": {"logout": None}}, "login")
 
     async def reboot(self):
         if self.token is None:
             await self.authenticate()
 
-        json = await self.request(f"{self.host}/stok={self.token}/ds", {"method": "do", "system": {"reboot": None}})
+        json = await self.request(f"{self.host}/stok={self.token}/ds", {"method": "do", "system": {"reboot": None}}, "reboot")
 
         if json.get("error_code") == -40401:
             self.token = None
@@ -52,20 +197,36 @@ class TPLinkEnterpriseRouterClient:
 
         json = await self.request(
             f"{self.host}/stok={self.token}/ds",
-            {"method": "set", "apmng_set": {"ap_led_global_switch": {"led_switch": status}}}
+            {"method": "set", "apmng_set": {"ap_led_global_switch": {"led_switch": status}}},
+            "write",
         )
 
         if json.get("error_code") == -40401:
             self.token = None
             await self.set_ap_light(status)
 
+    async def set_ap_led(self, entry_id: str, status: str):
+        if self.token is None:
+            await self.authenticate()
+
+        json = await self.request(
+            f"{self.host}/stok={self.token}/ds",
+            {"method": "set", "apmng_set": {"table": "ap_list", "filter": [{"entry_id": entry_id}], "para": {"led": status}}},
+            "write",
+        )
+
+        if json.get("error_code") == -40401:
+            self.token = None
+            await self.set_ap_led(entry_id, status)
+
     async def reboot_ap(self, id_list: list):
         if self.token is None:
             await self.authenticate()
 
         json = await self.request(
             f"{self.host}/stok={self.token}/ds",
-            {"method": "do", "apmng_status": {"ap_reboot": {"entry_id": id_list}}}
+            {"method": "do", "apmng_status": {"ap_reboot": {"entry_id": id_list}}},
+            "reboot",
         )
 
         if json.get("error_code") == -40401:
@@ -81,20 +242,63 @@ class TPLinkEnterpriseRouterClient:
             {
                 "method": "set",
                 "apmng_wserv": {"table": "wlan_serv", "filter": [{"serv_id": str(serv_id)}], "para": para}
-            }
+            },
+            "write",
         )
 
         if json.get("error_code") == -40401:
             self.token = None
             await self.set_ssid(serv_id, para)
 
+    async def set_ssids(self, changes: dict) -> None:
+        """ SSIDs sharing the same para go in one request, one request per SSID if the firmware rejects it """
+        groups = {}
+        for serv_id, para in changes.items():
+            groups.setdefault(tuple(sorted(para.items())), []).append(str(serv_id))
+
+        for para_items, serv_ids in groups.items():
+            para = dict(para_items)
+            if len(serv_ids) > 1 and await self._set_ssid_batch(serv_ids, para):
+                continue
+
+            for serv_id in serv_ids:
+                await self.set_ssid(serv_id, para)
+
+    async def _set_ssid_batch(self, serv_ids: list, para) -> bool:
+        if self.token is None:
+            await self.authenticate()
+
+        json = await self.request(
+            f"{self.host}/stok={self.token}/ds",
+            {
+                "method": "set",
+                "apmng_wserv": {
+                    "table": "wlan_serv",
+                    "filter": [{"serv_id": serv_id} for serv_id in serv_ids],
+                    "para": para
+                }
+            },
+            "write",
+        )
+
+        if json.get("error_code") == -40401:
+            self.token = None
+            return await self._set_ssid_batch(serv_ids, para)
+
+        if json.get("error_code") != 0:
+            _LOGGER.debug("Batch SSID update rejected by %s: %s", self.host, json.get("error_code"))
+            return False
+
+        return True
+
     async def get_syslog(self, count: int):
         if self.token is None:
             await self.authenticate()
 
         json = await self.request(
             f"{self.host}/stok={self.token}/ds",
-            {"method":"do","system":{"read_logs":{"page":"1","num_per_page":str(count)}}}
+            {"method":"do","system":{"read_logs":{"page":"1","num_per_page":str(count)}}},
+            "syslog",
         )
 
         if json.get("error_code") == -40401:
@@ -103,57 +307,138 @@ class TPLinkEnterpriseRouterClient:
 
         return json
 
+    async def get_hosts(self) -> list[dict]:
+        """ Host table only, with just the fields needed to pick devices """
+        if self.token is None:
+            await self.reauthenticate(None)
+
+        token = self.token
+        json = await self.request(f"{self.host}/stok={token}/ds", self._hosts_body, "status")
+
+        if json.get("error_code") == -40401:
+            await self.reauthenticate(token)
+            json = await self.request(f"{self.host}/stok={self.token}/ds", self._hosts_body, "status")
+
+        hosts = [list(item.values())[0] for item in json.get("host_management", {}).get("host_info", [])]
+        return [
+            {key: unquote(host[key]) for key in HOST_PICKER_FIELDS if key in host}
+            for host in hosts
+        ]
+
     async def get_status(self):
         if self.token is None:
             await self.authenticate()
 
         json = await self.request(
             f"{self.host}/stok={self.token}/ds",
-            {
-                "method": "get",
-                "host_management": {
-                    "name": "host_count_info",
-                    "table": "host_info"
-                },
-                "system": {
-                    "name": [
-                        "cpu_usage",
-                        "mem_usage",
-                        "device_info"
-                    ]
-                },
-                "online_check": {"table": "state", "name": "state"},
-                # "apmng_status": {
-                #     "name": "apmng_status"
-                # },
-                "apmng_set": {
-                    "table": "ap_list",
-                    "filter": [
-                        {"group_id": "0", "ap_role": "re_all"}, {"group_id": "0"}
-                    ],
-                    "para": {"start": 0, "end": 499}
-                },
-                "apmng_wserv": {
-                    "table": "wlan_serv", "filter": {"network_type": ["1", "2", "3"]},
-                    "para": {"start": 0, "end": 9}
-                }
-            })
+            self._status_body,
+            "status",
+            stream=self.streaming_decode,
+        )
 
         """ Authenticate before request """
         if json.get("error_code") == -40401:
             self.token = None
             return await self.get_status()
 
-        return self.process_data(json)
+        if json.get("error_code", 0) != 0:
+            raise RouterApiError(self.host, "status", json.get("error_code"))
+
+        with self.metrics.measure("process_data"):
+            return self.process_data(json)
+
+    async def get_status_sections(self, on_section: Callable[[str, dict], None]) -> dict:
+        """ Query every status section concurrently, on_section is called as each one is processed """
+        if self.token is None:
+            await self.reauthenticate(None)
+
+        pending = {asyncio.create_task(self._get_section(section)) for section in STATUS_QUERIES}
+        errors = {}
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                section, data, error = task.result()
+                if error is not None:
+                    _LOGGER.warning("Failed to get %s from %s: %s", section, self.host, error)
+                    errors[section] = str(error)
+                    continue
+
+                on_section(section, data)
+
+        return errors
+
+    async def get_section(self, section: str) -> dict:
+        """ Read and process a single status section, used to confirm writes without a full poll """
+        if self.token is None:
+            await self.reauthenticate(None)
+
+        _, data, error = await self._get_section(section)
+        if error is not None:
+            """ Classified request errors keep their type, anything else is a bug """
+            raise error
+
+        return data
+
+    async def _get_section(self, section: str):
+        try:
+            with self.metrics.measure(f"section_{section}"):
+                token, json = await self._request_section(section)
+
+                if json.get("error_code") == -40401:
+                    await self.reauthenticate(token)
+                    token, json = await self._request_section(section)
+
+                if json.get("error_code", 0) != 0:
+                    raise RouterApiError(self.host, "status", json.get("error_code"))
+
+                with self.metrics.measure("process_data"):
+                    return section, SECTION_PROCESSORS[section](self, json), None
+        except Exception as e:
+            return section, None, e
+
+    async def _request_section(self, section: str) -> tuple:
+        token = self.token
+        json = await self.request(
+            f"{self.host}/stok={token}/ds",
+            self._section_bodies[section],
+            "status",
+            stream=self.streaming_decode,
+        )
+
+        return token, json
+
+    async def reauthenticate(self, stale_token) -> None:
+        """ Concurrent requests share a single login when the token expires """
+        async with self._auth_lock:
+            if self.token is None or self.token == stale_token:
+                self.token = None
+                await self.authenticate()
 
     def process_data(self, json):
+        data = {}
+        for processor in SECTION_PROCESSORS.values():
+            data.update(processor(self, json))
+
+        return data
+
+    def _process_system(self, json) -> dict:
         system = json.get("system", {})
 
         """ Calculate cpu used """
         cpu_usage = system.get('cpu_usage')
-        cpu_usages = [int(v) for v in cpu_usage.values()]
+        cpu_core_usage = {core: int(v) for core, v in cpu_usage.items()}
+        cpu_usages = list(cpu_core_usage.values())
         cpu_used = sum(cpu_usages) / len(cpu_usages) if cpu_usages else 0
 
+        return {
+            "cpu_used": cpu_used,
+            "cpu_core_usage": cpu_core_usage,
+            "memory_used": system.get("mem_usage", {}).get("mem"),
+            "device_info": system.get("device_info"),
+        }
+
+    def _process_online_check(self, json) -> dict:
         """ Calculate Wan count and status """
         _online_check = json.get("online_check", {})
         state_dict = _online_check.get("state", {})
@@ -163,52 +448,51 @@ class TPLinkEnterpriseRouterClient:
         ]
         wan_count = _online_check.get("count", {}).get("state", None)
 
-        """ Calculate hosts """
-        hosts = json['host_management']['host_info']
-        clean_hosts = [list(item.values())[0] for item in hosts]
-        local_ip = next((host['ip'] for host in clean_hosts if host['is_cur_host']), None)
-        clean_hosts = [
-            {key: unquote(item.get(key, ''))
-             for key in
-             ['connect_date', 'rssi', 'ip', 'hostname', 'connect_time', 'mac', 'type', 'ssid', 'freq_name', 'ap_name']
-             if key in item} for item in clean_hosts
-        ]
-        wireless_hosts = [
-            {k: v for k, v in host.items() if k != "type"}
-            for host in clean_hosts if host.get("type") == "wireless"
-        ]
-        wired_hosts = [
-            {k: v for k, v in host.items() if k != "type"}
-            for host in clean_hosts if host.get("type") == "wired"
-        ]
-        ap_connected_hosts = {
-            ap_name: [
-                host
-                for host in hosts
-                if host.get('ap_name') == ap_name and host.get('type') == 'wireless' and host.get('ip')
-            ]
-            for ap_name in set(
-                host.get('ap_name', '')
-                for host in hosts
-                if host.get('ap_name') and host.get('type') == 'wireless' and host.get('ip')
-            )
+        return {
+            "wan_states": wan_states,
+            "wan_count": wan_count,
         }
 
-        """ Calculate SSID count """
+    def _process_hosts(self, json) -> dict:
+        """ Calculate hosts """
+        hosts = json['host_management']['host_info']
+        if isinstance(hosts, CleanRecords):
+            clean_hosts = hosts
+            local_ip = hosts.local_ip
+        else:
+            clean_hosts = [list(item.values())[0] for item in hosts]
+            local_ip = next((host['ip'] for host in clean_hosts if host['is_cur_host']), None)
+            clean_hosts = [_clean_host(item) for item in clean_hosts]
+        """ One pass over the hosts for the type split and all the per AP / SSID / band counts """
+        wireless_hosts = []
+        wired_hosts = []
+        ap_host_count = {}
+        ssid_counts = {}
+        band_counts = {}
+        for host in clean_hosts:
+            host_type = host.get("type")
+            if host_type == "wired":
+                wired_hosts.append({k: v for k, v in host.items() if k != "type"})
+                continue
+            if host_type != "wireless":
+                continue
+
+            wireless_hosts.append({k: v for k, v in host.items() if k != "type"})
+            ap_name = host.get('ap_name')
+            if ap_name and host.get('ip'):
+                ap_host_count[ap_name] = ap_host_count.get(ap_name, 0) + 1
+            ssid = host.get('ssid')
+            if ssid:
+                ssid_counts[ssid] = ssid_counts.get(ssid, 0) + 1
+            freq_name = host.get('freq_name')
+            if freq_name:
+                band_counts[freq_name] = band_counts.get(freq_name, 0) + 1
+
+        """ Calculate SSID count, the router's own numbers win when it reports them """
         host_count_info = json['host_management']['host_count_info']
         if 'ssid_host_count' in host_count_info and host_count_info['ssid_host_count']:
-            ssid_host_count = [{"ssid": key, "count": value} for key, value in
-                               host_count_info['ssid_host_count'].items()]
-        else:
-            ssid_counts = {}
-            for host_info in clean_hosts:
-                if host_info.get("type") == "wireless" and host_info.get("ssid"):
-                    ssid = host_info.get("ssid")
-                    if ssid in ssid_counts:
-                        ssid_counts[ssid] += 1
-                    else:
-                        ssid_counts[ssid] = 1
-            ssid_host_count = [{"ssid": ssid, "count": count} for ssid, count in ssid_counts.items()]
+            ssid_counts = dict(host_count_info['ssid_host_count'])
+        ssid_host_count = [{"ssid": ssid, "count": count} for ssid, count in ssid_counts.items()]
 
         if ('wired_host_count' in host_count_info and
                 'wireless_host_count' in host_count_info):
@@ -218,60 +502,156 @@ class TPLinkEnterpriseRouterClient:
             wired_host_count = len(wired_hosts)
             wireless_host_count = len(wireless_hosts)
 
-        ap_list = json.get("apmng_set", {}).get("ap_list", [])
-        ap_list = [inner_dict for item in ap_list for inner_dict in item.values()]
-        ap_list = [{key: unquote(item[key]) for key in ['entry_name', 'entry_id', 'mac', 'status', 'led'] if key in item} for
-                   item in ap_list]
-        ap_count = len(ap_list)
-        ap_online_count = sum(1 for ap in ap_list if ap.get("status") == "2")
-        ap_offline_count = sum(1 for ap in ap_list if ap.get("status") != "2")
-        ap_online_list = [ap for ap in ap_list if ap.get("status") == "2"]
-        ap_offline_list = [ap for ap in ap_list if ap.get("status") != "2"]
-
-        """ Get SSID List """
-        ssid_list = json.get("apmng_wserv", {}).get("wlan_serv", [])
-        ssid_list = [{key: unquote(item[key]) for key in ['ssid', 'enable', 'serv_id'] if key in item} for dict in ssid_list for
-                     item in dict.values()]
-
         return {
             "hosts": clean_hosts,
             "hosts_dict": {str(item["mac"]): item for item in clean_hosts},
             "wireless_hosts": wireless_hosts,
             "wired_hosts": wired_hosts,
-            "ap_connected_hosts": ap_connected_hosts,
+            "ap_host_count": ap_host_count,
             "host_count": len(hosts),
             "wired_host_count": wired_host_count,
             "wireless_host_count": wireless_host_count,
             "ssid_host_count": ssid_host_count,
-            "cpu_used": cpu_used,
-            "memory_used": system.get("mem_usage", {}).get("mem"),
-            "wan_states": wan_states,
-            "wan_count": wan_count,
-            "device_info": system.get("device_info"),
+            "ssid_client_count": ssid_counts,
+            "band_client_count": band_counts,
+            "local_ip": local_ip
+        }
+
+    def _process_ap_list(self, json) -> dict:
+        ap_list = json.get("apmng_set", {}).get("ap_list", [])
+        if not isinstance(ap_list, CleanRecords):
+            ap_list = [_clean_ap(inner_dict) for item in ap_list for inner_dict in item.values()]
+        ap_count = len(ap_list)
+        ap_online_count = sum(1 for ap in ap_list if ap.get("status") == "2")
+        ap_offline_count = sum(1 for ap in ap_list if ap.get("status") != "2")
+        ap_online_list = [ap for ap in ap_list if ap.get("status") == "2"]
+        ap_offline_list = [ap for ap in ap_list if ap.get("status") != "2"]
+
+        return {
             "ap_count": ap_count,
             "ap_list": ap_list,
             "ap_online_count": ap_online_count,
             "ap_online_list": ap_online_list,
             "ap_offline_count": ap_offline_count,
             "ap_offline_list": ap_offline_list,
-            "ssid_list": ssid_list,
-            "local_ip": local_ip
         }
 
-    async def request(self, url, payload):
-        headers = {
-            "Content-Type": "application/json",
+    def _process_ssid_list(self, json) -> dict:
+        """ Get SSID List """
+        ssid_list = json.get("apmng_wserv", {}).get("wlan_serv", [])
+        ssid_list = [{key: unquote(item[key]) for key in ['ssid', 'enable', 'serv_id'] if key in item} for dict in ssid_list for
+                     item in dict.values()]
+
+        return {
+            "ssid_list": ssid_list,
         }
-        timeout = ClientTimeout(total=5)
 
-        try:
+    async def request(self, url, payload: dict | bytes, operation: str = "status", stream: bool = False):
+        """ payload may be pre-encoded bytes, the response is decoded from raw bytes with the client codec
+
+        Reads are retried with a jittered backoff, every call fails right away while the circuit is open.
+        Errors are classified and never include the payload (credentials) or the session token.
+        """
+        body = payload if isinstance(payload, bytes) else self.codec.dumps(payload)
+        attempts = 1 + REQUEST_RETRIES if operation in RETRYABLE_OPERATIONS else 1
+
+        for attempt in range(attempts):
+            self.circuit.check(operation)
+            self._requests += 1
+            try:
+                json = await self._request_once(url, body, operation, stream)
+            except Exception as e:
+                error = classify_error(e, self.host, operation)
+                if error is None:
+                    raise
+                self.metrics.increment(f"error_{error.kind}")
+                self.circuit.record_failure(error)
+
+                if not error.retryable or attempt + 1 == attempts or self.circuit.is_open:
+                    if error is e:
+                        raise
+                    raise error from e
+
+                self.metrics.increment("retry")
+                await asyncio.sleep(REQUEST_RETRY_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5))
+            else:
+                self.circuit.record_success()
+                return json
+
+    async def _request_once(self, url, body: bytes, operation: str, stream: bool):
+        with self.metrics.measure("request"):
             async with self._session.post(
                     url,
-                    headers=headers,
-                    json=payload,
-                    timeout=timeout,
+                    headers=HEADERS,
+                    data=body,
+                    timeout=self._timeouts[operation],
             ) as response:
-                return await response.json()
-
+                """ Whatever the body, even JSON, an error status is an HTTP error """
+                if response.status >= 400:
+                    raise RouterHttpError(self.host, operation, response.status)
+                if stream:
+                    return await self._decode_stream(response)
+                content = await response.read()
+
+        self.metrics.record("response_bytes", len(content))
+        with self.metrics.measure("decode"):
+            return self.codec.loads(content)
+
+    async def _probe(self) -> None:
+        """ Any HTTP answer means the router is reachable again """
+        try:
+            async with self._session.get(self.host, timeout=self._timeouts["login"]) as response:
+                await response.read()
         except Exception as e:
-            raise IntegrationError(f"Fail to request host: {self.host} payload: {payload} error: {e}")
+            error = classify_error(e, self.host, "probe")
+            if error is None:
+                raise
+            raise error from e
+
+    async def _decode_stream(self, response) -> dict:
+        """ Host and AP records are unwrapped and cleaned as they arrive, the raw table is never held whole """
+        hosts = CleanRecords()
+        ap_list = CleanRecords()
+
+        def on_host(item: dict) -> None:
+            host = next(iter(item.values()))
+            if hosts.local_ip is None and host.get('is_cur_host'):
+                hosts.local_ip = host.get('ip')
+            hosts.append(_clean_host(host))
+
+        def on_ap(item: dict) -> None:
+            ap_list.extend(_clean_ap(ap) for ap in item.values())
+
+        decoder = StreamingRecordDecoder({"host_info": on_host, "ap_list": on_ap}, loads=self.codec.loads)
+        size = 0
+        decode_time = 0.0
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+            size += len(chunk)
+            started = time.perf_counter()
+            decoder.feed(chunk)
+            decode_time += time.perf_counter() - started
+
+        started = time.perf_counter()
+        json = decoder.close()
+        decode_time += time.perf_counter() - started
+
+        self.metrics.record("response_bytes", size)
+        self.metrics.record("decode", decode_time * 1000)
+        self.metrics.record("streamed_records", decoder.records)
+
+        """ Streamed tables are left empty in the document, put the cleaned records back """
+        if "host_info" in json.get("host_management", {}):
+            json["host_management"]["host_info"] = hosts
+        if "ap_list" in json.get("apmng_set", {}):
+            json["apmng_set"]["ap_list"] = ap_list
+
+        return json
+
+
+SECTION_PROCESSORS = {
+    "host_management": TPLinkEnterpriseRouterClient._process_hosts,
+    "system": TPLinkEnterpriseRouterClient._process_system,
+    "online_check": TPLinkEnterpriseRouterClient._process_online_check,
+    "apmng_set": TPLinkEnterpriseRouterClient._process_ap_list,
+    "apmng_wserv": TPLinkEnterpriseRouterClient._process_ssid_list,
+}
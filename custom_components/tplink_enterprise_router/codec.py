@@ -0,0 +1,47 @@
+"""JSON codec used by the request layer, the fastest installed backend wins."""
+from __future__ import annotations
+
+import json
+from collections.abc import Callable
+from typing import Any, NamedTuple
+
+
+class JsonCodec(NamedTuple):
+    name: str
+    loads: Callable[[bytes | str], Any]
+    dumps: Callable[[Any], bytes]
+
+
+def _stdlib_codec() -> JsonCodec:
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    return JsonCodec("json", json.loads, lambda obj: encoder.encode(obj).encode("utf-8"))
+
+
+def _orjson_codec() -> JsonCodec | None:
+    """ Shipped with Home Assistant core, so normally available """
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return JsonCodec("orjson", orjson.loads, orjson.dumps)
+
+
+BACKENDS: dict[str, Callable[[], JsonCodec | None]] = {
+    "orjson": _orjson_codec,
+    "json": _stdlib_codec,
+}
+
+
+def get_codec(name: str | None = None) -> JsonCodec:
+    """ The requested backend if installed, else the first installed one in BACKENDS order """
+    if name is not None:
+        codec = BACKENDS[name]()
+        if codec is not None:
+            return codec
+
+    for backend in BACKENDS.values():
+        codec = backend()
+        if codec is not None:
+            return codec
+
+    return _stdlib_codec()
@@ -3,8 +3,44 @@ DOMAIN = "tplink_enterprise_router"
 DEFAULT_NAME = "TP Link Enterprise Router"
 DEFAULT_HOST = "http://192.168.0.1"
 DEFAULT_INSTANCE_NAME = "TP Link Enterprise Router"
-PLATFORMS = ["sensor", "button", "switch", "device_tracker"]
+PLATFORMS = ["sensor", "binary_sensor", "button", "switch", "device_tracker"]
 DEFAULT_TRACKED_DEVICES = ""  # 空字符串表示追踪所有设备
+SNAPSHOT_STORAGE_KEY = DOMAIN + "_{entry_id}_snapshot"
+DEFAULT_REQUEST_TIMEOUTS = {
+    "login": 5,
+    "status": 5,
+    "syslog": 5,
+    "write": 10,
+    "reboot": 30,
+}
+DEDICATED_SESSION_LIMIT_PER_HOST = 4
+DEDICATED_SESSION_KEEPALIVE = 75
+DEDICATED_SESSION_DNS_TTL = 300
+STREAM_CHUNK_SIZE = 16384
+RETRYABLE_OPERATIONS = ("status", "syslog")
+REQUEST_RETRIES = 2
+REQUEST_RETRY_BACKOFF = 0.5
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_PROBE_INTERVAL = 10
+CIRCUIT_PROBE_MAX_INTERVAL = 300
+DATA_SCHEDULER = "scheduler"
+DEFAULT_MAX_CONCURRENT_POLLS = 4
+DEFAULT_METRICS_WINDOW = 100
+AP_REBOOT_POLL_INTERVAL = 10
+AP_REBOOT_OFFLINE_GRACE = 60
+DEFAULT_AP_REBOOT_ONLINE_TIMEOUT = 300
+DEFAULT_AP_REBOOT_MAX_FAILURES = 0
+HISTORY_RAW_SAMPLES = 720
+HISTORY_RESOLUTIONS = {
+    "1m": (60, 180),
+    "15m": (900, 96),
+    "1h": (3600, 168),
+}
+ROAMING_HISTORY_SIZE = 64
+""" Clients kept in the roaming history, the ones without events for the longest are dropped first """
+ROAMING_MAX_CLIENTS = 2000
+DEFAULT_DISPATCH_BUDGET = 50
+PICKER_PAGE_SIZE = 50
 MIN_SEVERITY_LEVELS = {
     "emerg": 0,
     "alert": 1,
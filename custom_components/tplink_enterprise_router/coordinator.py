@@ -1,21 +1,41 @@
 from __future__ import annotations
 
 import logging
+import time
 from datetime import timedelta
 from urllib.parse import unquote
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.device_registry import CONNECTION_NETWORK_MAC
 from homeassistant.helpers.entity import DeviceInfo
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from custom_components.tplink_enterprise_router.client import TPLinkEnterpriseRouterClient
-from .const import DOMAIN
+from custom_components.tplink_enterprise_router.client import TPLinkEnterpriseRouterClient, STATUS_QUERIES
+from .ap_reboot import RollingApReboot
+from .const import (
+    DOMAIN,
+    SNAPSHOT_STORAGE_KEY,
+    DEFAULT_REQUEST_TIMEOUTS,
+    DEFAULT_AP_REBOOT_ONLINE_TIMEOUT,
+    DEFAULT_AP_REBOOT_MAX_FAILURES,
+)
+from .errors import RouterRequestError
+from .history import HealthHistory
+from .index import ApIndex, HostIndex
+from .metrics import PollMetrics
+from .profiler import CycleProfiler
+from .roaming import RoamingHistory
+from .status import StatusOverlay, StatusSnapshot
+from .ssid_schedule import SsidSchedule
 from .syslog_tracker import SyslogTracker
 
 _LOGGER = logging.getLogger(__name__)
 
+SNAPSHOT_SAVE_DELAY = 60
+
 
 class TPLinkEnterpriseRouterCoordinator(DataUpdateCoordinator):
 
@@ -29,22 +49,48 @@ class TPLinkEnterpriseRouterCoordinator(DataUpdateCoordinator):
         password = entry.data.get('password')
         update_interval = entry.data.get('update_interval', 30)
         unique_id = entry.data.get('unique_id', entry.entry_id)
-        self.status = {
-            "polling": True,
-        }
+        self.status = StatusSnapshot({}, overlay=StatusOverlay({"polling": True}))
         self.device_info = None
         self.unique_id = unique_id
+        self.poll_interval = timedelta(seconds=update_interval)
         self.force_update = False
+        self.restored = False
+        self.section_errors = {}
+        self.host_index = HostIndex([])
+        self.ap_index = ApIndex([])
+        self._loaded_sections = set()
+        self._snapshot_store = Store(hass, version=1, key=SNAPSHOT_STORAGE_KEY.format(entry_id=entry.entry_id))
+        self._snapshot_data: dict = {}
+        self._snapshot_saved_at: float | None = None
 
         self.entry = entry
-        self.client = TPLinkEnterpriseRouterClient(hass, self.host, username, password)
-        self.syslog_tracker = SyslogTracker(hass, entry, self.client)
+        self.metrics = PollMetrics()
+        self.history = HealthHistory()
+        self.profiler = CycleProfiler(hass, entry.entry_id)
+        self.client = TPLinkEnterpriseRouterClient(
+            hass,
+            self.host,
+            username,
+            password,
+            dedicated_session=entry.data.get("enable_dedicated_session", False),
+            timeouts={
+                "status": entry.data.get("status_timeout", DEFAULT_REQUEST_TIMEOUTS["status"]),
+                "reboot": entry.data.get("reboot_timeout", DEFAULT_REQUEST_TIMEOUTS["reboot"]),
+            },
+            metrics=self.metrics,
+            streaming_decode=entry.data.get("enable_streaming_decode", False),
+        )
+        self.roaming = RoamingHistory(hass, entry.entry_id)
+        self.syslog_tracker = SyslogTracker(hass, entry, self.client, self.roaming)
+        self.ssid_schedule = SsidSchedule(hass, self)
+        self.ap_reboot = RollingApReboot(hass, self)
 
         super().__init__(
             hass,
             _LOGGER,
             name="TPLinkEnterpriseRouter",
-            update_interval=timedelta(seconds=update_interval),
+            # ticks are driven by the domain PollScheduler
+            update_interval=None,
         )
 
     async def reboot(self) -> None:
@@ -57,34 +103,147 @@ class TPLinkEnterpriseRouterCoordinator(DataUpdateCoordinator):
             return
 
         id_list = [d["entry_id"] for d in ap_list]
-        await self.client.reboot_ap(id_list)
+        batch_size = self.entry.data.get("ap_reboot_batch_size", 0)
+
+        if not batch_size:
+            await self.client.reboot_ap(id_list)
+            return
+
+        self.start_rolling_reboot(id_list, batch_size)
 
     async def reboot_ap_and_router(self):
-        await self.reboot_ap()
-        await self.reboot()
+        """ Router is rebooted once the APs are back online """
+        id_list = [d["entry_id"] for d in self.status.get("ap_list") or []]
+        batch_size = self.entry.data.get("ap_reboot_batch_size", 0) or len(id_list) or 1
+        self.start_rolling_reboot(id_list, batch_size, reboot_router=True)
+
+    def start_rolling_reboot(
+            self,
+            id_list: list,
+            batch_size: int,
+            online_timeout: int = DEFAULT_AP_REBOOT_ONLINE_TIMEOUT,
+            max_failures: int = DEFAULT_AP_REBOOT_MAX_FAILURES,
+            reboot_router: bool = False,
+    ) -> None:
+        if self.ap_reboot.running:
+            raise HomeAssistantError(f"AP reboot already running on {self.host}")
+
+        """ Maintenance takes minutes, progress is reported through events, cancelled on unload """
+        self.entry.async_create_background_task(
+            self.hass,
+            self.ap_reboot.async_run(id_list, batch_size, online_timeout, max_failures, reboot_router),
+            f"{DOMAIN} {self.entry.entry_id} rolling AP reboot",
+        )
 
     async def set_ap_light(self, status: str) -> None:
         await self.client.set_ap_light(status)
 
+        """ LED state is part of the AP table """
+        await self.refresh_section("apmng_set")
+
+    async def set_ap_led(self, entry_id: str, status: str) -> None:
+        await self.client.set_ap_led(entry_id, status)
+        await self.refresh_section("apmng_set")
+
+    def set_optimistic(self, values: dict) -> dict:
+        """ Publish values ahead of the router, returns what restore_optimistic needs to undo it """
+        overlay, previous = self.status.overlay.set(values)
+        self.status = self.status.with_overlay(overlay)
+        return previous
+
+    def restore_optimistic(self, previous: dict) -> None:
+        self.status = self.status.with_overlay(self.status.overlay.restore(previous))
+
+    def confirm_optimistic(self, keys) -> None:
+        """ Only the read back of the write that set them confirms them, not any poll landing meanwhile """
+        self.status = self.status.confirmed(keys)
+
     async def set_polling(self, value: bool) -> None:
-        self.set_status({
-            "polling": value
-        })
-        await self.async_refresh()
+        self.set_optimistic({"polling": value})
+        self.async_update_listeners()
+
+        """ Nothing to read back when pausing, resume with a fresh poll """
+        if value:
+            await self.async_request_refresh()
 
-    async def set_ssid(self, serv_id: str, para) -> None:
+    async def set_ssid(self, serv_id: str, para) -> bool:
         await self.client.set_ssid(serv_id, para)
-        await self.async_refresh()
+        await self.refresh_section("apmng_wserv")
+
+        """ Confirm the write against the SSID table that was just read """
+        ssid = next((item for item in self.status.get("ssid_list", []) if item.get("serv_id") == str(serv_id)), None)
+        return ssid is not None and all(ssid.get(key, value) == value for key, value in para.items())
+
+    async def set_ssids(self, states: dict) -> dict:
+        """ Switch several SSIDs by serv_id with a single write and a single read back """
+        properties = {f"__SSID_{serv_id}": enabled for serv_id, enabled in states.items()}
+
+        """ All switches change together, and roll back together """
+        previous = self.set_optimistic(properties)
+        self.async_update_listeners()
+
+        try:
+            await self.client.set_ssids({
+                serv_id: {"enable": "on" if enabled else "off"} for serv_id, enabled in states.items()
+            })
+            await self.refresh_section("apmng_wserv")
+        except Exception:
+            self.restore_optimistic(previous)
+            self.async_update_listeners()
+            raise
+
+        self.confirm_optimistic(properties)
+        self.async_update_listeners()
+
+        return {serv_id: self.status.get(f"__SSID_{serv_id}") == enabled for serv_id, enabled in states.items()}
+
+    def find_serv_id(self, ssid: str) -> str | None:
+        """ Accept either the SSID name or its serv_id """
+        for item in self.status.get("ssid_list", []):
+            if ssid in (item.get("ssid"), item.get("serv_id")):
+                return item.get("serv_id")
+
+        return None
+
+    async def refresh_section(self, section: str) -> None:
+        """ Read a single status section and merge it into the current status """
+        data = await self.client.get_section(section)
+        self._apply_data(data)
+        self.async_update_listeners()
 
     async def refresh(self) -> None:
         self.force_update = True
         await self.async_refresh()
 
     def set_status(self, data) -> None:
-        self.status = {
-            **self.status,
-            **data,
-        }
+        """ Publish the next status version, sections not in data are shared with the previous one """
+        self.status = self.status.with_data(data)
+
+    async def async_restore_snapshot(self) -> bool:
+        """ Load the last processed status so entities can be created before the router answers """
+        data = await self._snapshot_store.async_load()
+
+        if not data:
+            return False
+
+        data["hosts_dict"] = {str(item["mac"]): item for item in data.get("hosts", [])}
+        self._apply_data(data, live=False)
+        self.restored = True
+        self._loaded_sections = set(STATUS_QUERIES)
+
+        return True
+
+    async def async_refresh(self) -> None:
+        if self.profiler.active:
+            await self.profiler.async_profile_cycle(super().async_refresh)
+            return
+
+        await super().async_refresh()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        with self.metrics.measure("entity_update"):
+            super().async_update_listeners()
 
     async def _async_update_data(self):
         if not self.status["polling"] and not self.force_update:
@@ -92,9 +251,81 @@ class TPLinkEnterpriseRouterCoordinator(DataUpdateCoordinator):
 
         self.force_update = False
 
+        with self.metrics.measure("poll"):
+            try:
+                await self._async_poll()
+            except RouterRequestError as e:
+                """ Expected while a router is unreachable, no traceback on every poll """
+                raise UpdateFailed(str(e)) from e
+
+    async def _async_poll(self) -> None:
         """ Pull status """
-        data = await self.client.get_status()
+        with self.metrics.measure("get_status"):
+            if self.entry.data.get("enable_parallel_status", False):
+                data = await self._async_update_sections()
+            else:
+                data = await self.client.get_status()
+                self._apply_data(data)
+
+        self.restored = False
+        self.metrics.record("host_count", data.get("host_count", 0))
+        self.metrics.record("ap_count", data.get("ap_count", 0))
+        self.history.record(self.status)
+
+        """ Persist snapshot at most every SNAPSHOT_SAVE_DELAY, a delayed save would be pushed back by every poll """
+        if self.entry.data.get("enable_snapshot_restore", True):
+            self._snapshot_data = data
+            now = time.monotonic()
+            if self._snapshot_saved_at is None or now - self._snapshot_saved_at >= SNAPSHOT_SAVE_DELAY:
+                self._snapshot_saved_at = now
+                self._snapshot_store.async_delay_save(self._snapshot_to_save, 0)
+
+        """ SyslogTracker poll """
+        if self.entry.data.get("enable_syslog_poll_event", False):
+            with self.metrics.measure("syslog_poll"):
+                await self.syslog_tracker.poll()
 
+    def _snapshot_to_save(self) -> dict:
+        """ hosts_dict is rebuilt from hosts on restore """
+        return {k: v for k, v in self._snapshot_data.items() if k != "hosts_dict"}
+
+    async def _async_update_sections(self) -> dict:
+        """ Apply each status section as soon as it arrives, failed sections keep their last value
+
+        Entities are notified as sections land, sections finishing in the same loop iteration share
+        one notification.
+        """
+        data = {}
+        notify_pending = False
+
+        def notify() -> None:
+            nonlocal notify_pending
+            notify_pending = False
+            self.async_update_listeners()
+
+        def on_section(section: str, section_data: dict) -> None:
+            nonlocal notify_pending
+            data.update(section_data)
+            self._loaded_sections.add(section)
+            self._apply_data(section_data)
+            if not notify_pending:
+                notify_pending = True
+                self.hass.loop.call_soon(notify)
+
+        self.section_errors = await self.client.get_status_sections(on_section)
+
+        """ Nothing answered: stale restored values must not look like a successful poll """
+        if len(self.section_errors) == len(STATUS_QUERIES):
+            raise UpdateFailed(f"Failed to get every status section from {self.host}")
+
+        missing = [section for section in self.section_errors if section not in self._loaded_sections]
+        if missing:
+            raise UpdateFailed(f"Failed to get {', '.join(missing)} from {self.host}")
+
+        """ Last confirmed router data only, optimistic overlay values must not reach the snapshot """
+        return {**self.status.data, **data}
+
+    def _apply_data(self, data: dict, live: bool = True) -> None:
         """ Update ssid status """
         ssid_list = data.get("ssid_list", [])
         for ssid in ssid_list:
@@ -102,10 +333,23 @@ class TPLinkEnterpriseRouterCoordinator(DataUpdateCoordinator):
             _property = f"__SSID_{serv_id}"
             data[_property] = ssid.get("enable") == 'on'
 
-        self.set_status(data)
+        with self.metrics.measure("set_status"):
+            self.set_status(data)
+
+        """ Rebuild indexes of the tables present in this update """
+        with self.metrics.measure("index"):
+            if "hosts" in data:
+                self.host_index = HostIndex(
+                    data["hosts"],
+                    self.host_index.last_seen,
+                    time.time() if live else None,
+                    self.entry.data.get("consider_home", 0),
+                )
+            if "ap_list" in data:
+                self.ap_index = ApIndex(data["ap_list"])
 
         """ Build DeviceInfo """
-        if self.device_info is None:
+        if self.device_info is None and data.get('device_info'):
             if data['device_info'].get('model'):
                 self.router_name = f"TP-Link {data['device_info']['model']} ({self.host})"
 
@@ -122,7 +366,3 @@ class TPLinkEnterpriseRouterCoordinator(DataUpdateCoordinator):
                 sw_version=self.firmware_version,
                 hw_version=data['device_info']['hardware_version'],
             )
-
-        """ SyslogTracker poll """
-        if self.entry.data.get("enable_syslog_poll_event", False):
-            await self.syslog_tracker.poll()
\ No newline at end of file
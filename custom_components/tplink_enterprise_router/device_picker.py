@@ -0,0 +1,127 @@
+"""Searchable, paginated tracked device picker shared by the config and options flows."""
+from __future__ import annotations
+
+import logging
+import re
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import config_validation as cv
+
+from .const import DOMAIN, PICKER_PAGE_SIZE
+from .index import HostIndex
+
+_LOGGER = logging.getLogger(__name__)
+
+MAC_PREFIX_PATTERN = re.compile(r"^[0-9A-Fa-f]{2}([-:]?[0-9A-Fa-f]{0,2})*$")
+
+
+async def async_get_picker_index(hass: HomeAssistant, entry_id: str | None = None, client=None) -> HostIndex:
+    """ Reuse the running coordinator's index, else fetch the host table alone """
+    coordinator = hass.data.get(DOMAIN, {}).get(entry_id) if entry_id else None
+    if coordinator is not None and coordinator.host_index.hosts:
+        return coordinator.host_index
+
+    if client is None and coordinator is not None:
+        client = coordinator.client
+    if client is None:
+        return HostIndex([])
+
+    try:
+        return HostIndex(await client.get_hosts())
+    except Exception as e:
+        _LOGGER.error("Error getting device list: %s", e)
+        return HostIndex([])
+
+
+def search_hosts(index: HostIndex, text: str, page: int) -> tuple[int, list[dict]]:
+    """ MAC prefixes and exact SSIDs go through the index, anything else matches hostname / IP """
+    offset = page * PICKER_PAGE_SIZE
+    if not text:
+        return index.query(sort_by="hostname", limit=PICKER_PAGE_SIZE, offset=offset)
+
+    if text in index.by_ssid:
+        return index.query(ssid=text, sort_by="hostname", limit=PICKER_PAGE_SIZE, offset=offset)
+
+    needle = text.lower()
+    matches = [
+        host for host in index.hosts
+        if needle in host.get("hostname", "").lower() or host.get("ip", "").startswith(text)
+    ]
+    if MAC_PREFIX_PATTERN.match(text):
+        _, by_mac = index.query(mac_prefix=text)
+        seen = {id(host) for host in matches}
+        matches.extend(host for host in by_mac if id(host) not in seen)
+
+    matches.sort(key=HostIndex.SORT_KEYS["hostname"])
+    return len(matches), matches[offset:offset + PICKER_PAGE_SIZE]
+
+
+def _label(host: dict) -> str:
+    return f"{host.get('hostname') or 'Unknown'} ({host['mac']}) - {host.get('ip', '')}"
+
+
+class DevicePickerMixin:
+    """Keeps the selection across searches and pages, an empty selection tracks every device."""
+
+    _picker_index: HostIndex | None = None
+    _picker_selected: set | None = None
+    _picker_shown: set | None = None
+    _picker_search = ""
+    _picker_page = 0
+
+    def _picker_start(self, index: HostIndex, selected: str) -> None:
+        self._picker_index = index
+        self._picker_selected = {mac.strip() for mac in selected.split(",") if mac.strip()}
+        self._picker_shown = set()
+        self._picker_search = ""
+        self._picker_page = 0
+
+    def _picker_submit(self, user_input: dict) -> bool:
+        """ Apply the selection of the page that was shown, True once the user is done """
+        chosen = set(user_input.get("tracked_devices", []))
+        self._picker_selected -= self._picker_shown - chosen
+        self._picker_selected |= chosen
+
+        search = user_input.get("search", "").strip()
+        if search != self._picker_search:
+            self._picker_search = search
+            self._picker_page = 0
+        else:
+            self._picker_page = max(0, int(user_input.get("page", 1)) - 1)
+
+        return bool(user_input.get("done", False))
+
+    @property
+    def picker_tracked_devices(self) -> str:
+        return ",".join(sorted(self._picker_selected))
+
+    def _picker_form(self, step_id: str):
+        total, hosts = search_hosts(self._picker_index, self._picker_search, self._picker_page)
+        pages = max(1, -(-total // PICKER_PAGE_SIZE))
+        if self._picker_page >= pages:
+            self._picker_page = pages - 1
+            total, hosts = search_hosts(self._picker_index, self._picker_search, self._picker_page)
+
+        options = {host["mac"]: _label(host) for host in hosts if host.get("mac")}
+        self._picker_shown = set(options)
+
+        return self.async_show_form(
+            step_id=step_id,
+            data_schema=vol.Schema({
+                vol.Optional("search", default=self._picker_search): str,
+                vol.Optional("page", default=self._picker_page + 1): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                vol.Optional(
+                    "tracked_devices",
+                    default=[mac for mac in options if mac in self._picker_selected],
+                ): cv.multi_select(options),
+                vol.Required("done", default=False): bool,
+            }),
+            description_placeholders={
+                "devices_count": str(total),
+                "page": str(self._picker_page + 1),
+                "pages": str(pages),
+                "selected_count": str(len(self._picker_selected)),
+            },
+        )
@@ -1,20 +1,26 @@
 import asyncio
 import logging
+import math
+import time
 
 from homeassistant.components.device_tracker import ScannerEntity, SourceType
 from homeassistant.components.device_tracker.config_entry import BaseTrackerEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers import area_registry as ar
 from homeassistant.helpers import translation
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import TPLinkEnterpriseRouterCoordinator
-from .const import DOMAIN
+from .const import DOMAIN, DEFAULT_DISPATCH_BUDGET
+from .dispatcher import StateWriteDispatcher
+from .index import normalize_mac
+from .oui import OuiIndex, async_get_oui_index, is_locally_administered
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -29,23 +35,113 @@ async def async_setup_entry(
 
     coordinator: TPLinkEnterpriseRouterCoordinator = hass.data[DOMAIN][entry.entry_id]
     tracker = DeviceTracker(hass, entry, coordinator, async_add_entities)
+    entry.async_on_unload(tracker.wheel.async_stop)
+    entry.async_on_unload(tracker.dispatcher.async_stop)
 
     """ Update the status of the old devices. """
     await tracker.init()
     await tracker.create_old_hosts()
 
+    worker = HostUpdateWorker(hass, tracker, coordinator.metrics)
+    entry.async_on_unload(worker.async_stop)
+
     @callback
     def coordinator_updated():
         """Update the status of the devices."""
-        asyncio.create_task(async_callback())
-
-    async def async_callback():
-        await tracker.update_hosts(coordinator.status['hosts_dict'])
+        worker.submit(coordinator.status['hosts_dict'])
 
     entry.async_on_unload(coordinator.async_add_listener(coordinator_updated))
     coordinator_updated()
 
 
+class HostUpdateWorker:
+    """Single consumer of the host snapshots, snapshots arriving while busy collapse into the newest one."""
+
+    def __init__(self, hass: HomeAssistant, tracker: "DeviceTracker", metrics) -> None:
+        self.hass = hass
+        self.tracker = tracker
+        self.metrics = metrics
+        self._pending: dict | None = None
+        self._submitted_at = 0.0
+        self._task: asyncio.Task | None = None
+
+    @callback
+    def submit(self, hosts_dict: dict) -> None:
+        if self._pending is not None:
+            self.metrics.increment("device_tracker_coalesced")
+
+        self._pending = hosts_dict
+        self._submitted_at = time.perf_counter()
+        if self._task is None:
+            self._task = self.hass.async_create_task(self._async_run())
+
+    @callback
+    def async_stop(self) -> None:
+        self._pending = None
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _async_run(self) -> None:
+        try:
+            while self._pending is not None:
+                hosts_dict, self._pending = self._pending, None
+                self.metrics.record("device_tracker_lag", (time.perf_counter() - self._submitted_at) * 1000)
+
+                try:
+                    with self.metrics.measure("device_tracker"):
+                        await self.tracker.update_hosts(hosts_dict)
+                except Exception as e:
+                    _LOGGER.error("Failed to update tracked hosts: %s", e)
+        finally:
+            self._task = None
+
+
+def compile_tracked_devices(tracked_devices: str) -> frozenset[str]:
+    """ Comma separated MAC option to a normalized set, empty means every device """
+    return frozenset(normalize_mac(mac) for mac in tracked_devices.split(",") if mac.strip())
+
+
+class NmapAreaLookup:
+    """Areas of the matching nmap_tracker devices / entities, indexed with one pass over the registries."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._devices: dict[str, dr.DeviceEntry] = {}
+        self._device_entity_areas: dict[str, str] = {}
+        self._unique_id_areas: dict[str, str] = {}
+
+    @callback
+    def refresh(self) -> None:
+        devices = {}
+        for device in dr.async_get(self.hass).devices.values():
+            for domain, identifier in device.identifiers:
+                if domain == "nmap_tracker":
+                    devices.setdefault(identifier, device)
+
+        device_entity_areas = {}
+        unique_id_areas = {}
+        for entity in er.async_get(self.hass).entities.values():
+            if not entity.area_id:
+                continue
+            if entity.device_id:
+                device_entity_areas.setdefault(entity.device_id, entity.area_id)
+            if entity.platform == "nmap_tracker":
+                unique_id_areas.setdefault(entity.unique_id, entity.area_id)
+
+        self._devices = devices
+        self._device_entity_areas = device_entity_areas
+        self._unique_id_areas = unique_id_areas
+
+    def area_for(self, mac: str) -> str | None:
+        """ Area of the Nmap device, else of one of its entities, else of the Nmap entity of the MAC """
+        device = self._devices.get(mac)
+        if device is not None:
+            return device.area_id or self._device_entity_areas.get(device.id)
+
+        return self._unique_id_areas.get(mac)
+
+
 class DeviceTracker:
     disconnected_text = "disconnected"
     connected_text = "connected"
@@ -63,9 +159,19 @@ class DeviceTracker:
         self.tracked: {str, TPLinkTracker} = {}
         self.coordinator = coordinator
         self.async_add_entities = async_add_entities
+        self.vendors: OuiIndex | None = None
+        self.wheel = ConsiderHomeWheel(hass)
+        self.dispatcher = StateWriteDispatcher(
+            hass, coordinator.metrics, entry.data.get("dispatch_budget", DEFAULT_DISPATCH_BUDGET)
+        )
+        self.nmap = NmapAreaLookup(hass)
+
+        """ Compiled once, the entry is reloaded when the option changes """
+        self.tracked_macs = compile_tracked_devices(entry.options.get("tracked_devices", ""))
 
     async def init(self):
         self.mac_list = await self._get_tracked_mac_list()
+        self.vendors = await async_get_oui_index(self.hass)
 
         """ Setup translations """
         translations = await translation.async_get_translations(
@@ -82,37 +188,38 @@ class DeviceTracker:
         )
 
     async def create_old_hosts(self):
-        entities = []
-        for mac in self.mac_list:
-            entity = TPLinkTracker(mac, self.coordinator)
-            entities.append(entity)
-            self.tracked[mac] = entity
-        self.async_add_entities(entities, False)
+        self.nmap.refresh()
+        self._add_trackers(self.mac_list)
 
     async def update_hosts(self, host_dict: dict) -> None:
-        # Get the tracked_devices setting from config options
-        tracked_devices_str = self.entry.options.get("tracked_devices", "")
-        
+        """ One registry pass per poll serves the area sync of every tracker """
+        self.nmap.refresh()
+
         # Filter host_dict if tracked_devices is specified
-        if tracked_devices_str:
-            # Parse the comma-separated MAC addresses
-            tracked_macs = [mac.strip().lower() for mac in tracked_devices_str.split(",")]
-            # Filter the host_dict to only include tracked devices
-            host_dict = {mac: device for mac, device in host_dict.items() 
-                        if mac.lower() in tracked_macs}
-        
-        new_mac_list = list(host_dict.keys())
-        added = list(set(new_mac_list) - set(self.mac_list))
-        removed = list(set(self.mac_list) - set(new_mac_list))
+        if self.tracked_macs:
+            host_dict = {mac: device for mac, device in host_dict.items()
+                         if normalize_mac(mac) in self.tracked_macs}
+
+        known = set(self.mac_list)
+        added = [mac for mac in host_dict if mac not in known]
+        if not added:
+            return
 
-        merged_mac_list = list(set(self.mac_list + new_mac_list))
-        self.mac_list = merged_mac_list
-        await self._save_tracked_mac_list(merged_mac_list)
+        self.mac_list = self.mac_list + added
+        await self._save_tracked_mac_list(self.mac_list)
+        self._add_trackers(added)
+
+    def _add_trackers(self, macs: list) -> None:
+        """ Register the devices of a whole batch against one snapshot of the registries, then add once """
+        if not macs:
+            return
 
         entities = []
-        for mac in added:
-            entity = TPLinkTracker(mac, self.coordinator)
+        for mac in macs:
+            entity = TPLinkTracker(mac, self.coordinator, self.vendors, self.wheel, self.dispatcher, self.nmap)
+            entity.register_device()
             entities.append(entity)
+            self.tracked[mac] = entity
         self.async_add_entities(entities, False)
 
     async def _get_tracked_mac_list(self) -> list:
@@ -132,6 +239,56 @@ class DeviceTracker:
         await self.store.async_save(data)
 
 
+class ConsiderHomeWheel:
+    """Single timer for the consider home expiries of every tracker, bucketed per second."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._slots: dict[int, set] = {}
+        self._next: int | None = None
+        self._unsub: CALLBACK_TYPE | None = None
+
+    @callback
+    def schedule(self, expires: float, tracker) -> None:
+        slot = math.ceil(expires)
+        self._slots.setdefault(slot, set()).add(tracker)
+        if self._next is None or slot < self._next:
+            self._arm(slot)
+
+    @callback
+    def discard(self, tracker) -> None:
+        for trackers in self._slots.values():
+            trackers.discard(tracker)
+
+    @callback
+    def async_stop(self) -> None:
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+        self._next = None
+        self._slots.clear()
+
+    @callback
+    def _arm(self, slot: int) -> None:
+        if self._unsub is not None:
+            self._unsub()
+        self._next = slot
+        self._unsub = async_call_later(self.hass, max(0.0, slot - time.time()), self._fire)
+
+    @callback
+    def _fire(self, _now) -> None:
+        self._unsub = None
+        self._next = None
+
+        now = time.time()
+        for slot in sorted(slot for slot in self._slots if slot <= now):
+            for tracker in self._slots.pop(slot):
+                tracker.async_expire()
+
+        if self._slots:
+            self._arm(min(self._slots))
+
+
 class TPLinkTracker(CoordinatorEntity, BaseTrackerEntity):
     """Representation of network device."""
 
@@ -139,10 +296,19 @@ class TPLinkTracker(CoordinatorEntity, BaseTrackerEntity):
             self,
             mac,
             coordinator: TPLinkEnterpriseRouterCoordinator,
+            vendors: OuiIndex | None = None,
+            wheel: ConsiderHomeWheel | None = None,
+            dispatcher: StateWriteDispatcher | None = None,
+            nmap: NmapAreaLookup | None = None,
     ) -> None:
         """Initialize the tracked device."""
         self.mac = mac
+        self.wheel = wheel
+        self.dispatcher = dispatcher
+        self.nmap = nmap
         self.device = coordinator.status['hosts_dict'].get(mac, {})
+        self.locally_administered = is_locally_administered(mac)
+        self.manufacturer = (vendors.vendor(mac) if vendors else None) or self.device.get("manufacturer", "Unknown")
         entry_key = coordinator.entry.entry_id
         self.hass = coordinator.hass
         
@@ -159,15 +325,12 @@ class TPLinkTracker(CoordinatorEntity, BaseTrackerEntity):
                 ("nmap_tracker", mac)
             },
             "name": self._get_device_name(),
-            "manufacturer": self.device.get("manufacturer", "Unknown"),
+            "manufacturer": self.manufacturer,
             "model": self.device.get("model", "Network Client"),
             "via_device": (DOMAIN, coordinator.entry.entry_id),  # Link to the router
         }
 
         super().__init__(coordinator)
-        
-        # Register or update the device after initialization
-        self._register_device()
 
     @property
     def is_connected(self) -> bool:
@@ -204,7 +367,13 @@ class TPLinkTracker(CoordinatorEntity, BaseTrackerEntity):
         # Last resort - use a generic name
         return "Network Device"
             
-    def _register_device(self) -> None:
+    def _nmap_area(self) -> str | None:
+        if self.nmap is None:
+            self.nmap = NmapAreaLookup(self.hass)
+            self.nmap.refresh()
+        return self.nmap.area_for(self.mac)
+
+    def register_device(self) -> None:
         """Register the device and update its area if needed."""
         device_registry = dr.async_get(self.hass)
         
@@ -220,85 +389,21 @@ class TPLinkTracker(CoordinatorEntity, BaseTrackerEntity):
         }
         
         # Only set manufacturer and model if they don't already exist or if we have new info
-        if not existing_device or not existing_device.manufacturer:
-            device_info["manufacturer"] = self.device.get("manufacturer", "Unknown")
+        if not existing_device or existing_device.manufacturer in (None, "", "Unknown"):
+            device_info["manufacturer"] = self.manufacturer
         
         if not existing_device or not existing_device.model:
             device_info["model"] = self.device.get("model", "Network Client")
         
         # Register or update the device
         device = device_registry.async_get_or_create(**device_info)
-        _LOGGER.info("Registered device %s with ID: %s", self.mac, device.id)
+        _LOGGER.debug("Registered device %s with ID: %s", self.mac, device.id)
         
-        # Try to find matching Nmap device by MAC address
-        nmap_devices = [
-            d for d in device_registry.devices.values()
-            if any(ident[0] == "nmap_tracker" and ident[1] == self.mac 
-                  for ident in d.identifiers)
-        ]
-        
-        if nmap_devices:
-            nmap_device = nmap_devices[0]
-            _LOGGER.info(
-                "Found matching Nmap device for %s: %s (area_id: %s)", 
-                self.mac, 
-                nmap_device.id, 
-                nmap_device.area_id
-            )
-            
-            # If Nmap device has an area assigned, use that area for our device
-            if nmap_device.area_id:
-                device_registry.async_update_device(
-                    device.id, 
-                    area_id=nmap_device.area_id
-                )
-                _LOGGER.info(
-                    "Updated device %s area to match Nmap device area: %s", 
-                    self.mac, 
-                    nmap_device.area_id
-                )
-            else:
-                _LOGGER.info("Nmap device %s has no area assigned", nmap_device.id)
-                
-                # Try to get area from entity registry
-                entity_registry = er.async_get(self.hass)
-                nmap_entities = [
-                    e for e in entity_registry.entities.values()
-                    if e.device_id == nmap_device.id and e.area_id
-                ]
-                
-                if nmap_entities:
-                    area_id = nmap_entities[0].area_id
-                    _LOGGER.info(
-                        "Found area %s from Nmap entity %s", 
-                        area_id, 
-                        nmap_entities[0].entity_id
-                    )
-                    device_registry.async_update_device(
-                        device.id, 
-                        area_id=area_id
-                    )
-        else:
-            _LOGGER.info("No matching Nmap device found for %s", self.mac)
-            
-            # Try to get area from entity registry directly
-            entity_registry = er.async_get(self.hass)
-            nmap_entities = [
-                e for e in entity_registry.entities.values()
-                if e.unique_id == self.mac and e.platform == "nmap_tracker" and e.area_id
-            ]
-            
-            if nmap_entities:
-                area_id = nmap_entities[0].area_id
-                _LOGGER.info(
-                    "Found area %s from Nmap entity with MAC %s", 
-                    area_id, 
-                    self.mac
-                )
-                device_registry.async_update_device(
-                    device.id, 
-                    area_id=area_id
-                )
+        # Use the area of the matching Nmap device / entity
+        area_id = self._nmap_area()
+        if area_id and area_id != device.area_id:
+            device_registry.async_update_device(device.id, area_id=area_id)
+            _LOGGER.info("Updated device %s area to match Nmap area: %s", self.mac, area_id)
         
         # Store device ID for later use
         self.device_id = device.id
@@ -340,12 +445,27 @@ class TPLinkTracker(CoordinatorEntity, BaseTrackerEntity):
 
     @property
     def extra_state_attributes(self) -> dict[str, str]:
-        return {
+        attrs = {
             'hostname': self.hostname,
             'ip_address': self.ip_address,
             'mac_address': self.mac_address,
         }
 
+        if self.locally_administered:
+            attrs['locally_administered'] = True
+
+        """ Roaming summary from the syslog history, the full history is served by get_roaming_history """
+        roaming = self.coordinator.roaming.summary(self.mac)
+        if roaming is not None:
+            attrs['roam_count'] = roaming['roam_count']
+            attrs['connected_since'] = roaming['connected_since']
+            attrs['last_change'] = roaming['last_change']
+
+        if self.coordinator.restored:
+            attrs['restored'] = True
+
+        return attrs
+
     # @property
     # def data(self) -> dict[str, str]:
     #     return dict(self.extra_state_attributes.items() | {
@@ -358,11 +478,55 @@ class TPLinkTracker(CoordinatorEntity, BaseTrackerEntity):
     def entity_registry_enabled_default(self) -> bool:
         return True
 
+    def _current_device(self) -> dict:
+        """ Keep the last known host while it is missing for less than consider_home """
+        device = self.coordinator.status['hosts_dict'].get(self.mac)
+        if device:
+            return device
+
+        consider_home = self.coordinator.entry.data.get("consider_home", 0)
+        if not consider_home or not self.device or self.wheel is None:
+            return {}
+
+        last_seen = self.coordinator.host_index.last_seen.get(normalize_mac(self.mac))
+        if last_seen is None or time.time() >= last_seen + consider_home:
+            return {}
+
+        self.wheel.schedule(last_seen + consider_home, self)
+        return self.device
+
+    @callback
+    def async_expire(self) -> None:
+        """ Called by the wheel once consider_home may have run out """
+        device = self._current_device()
+        if device is not self.device:
+            self.device = device
+            self._schedule_dispatch()
+
+    async def async_will_remove_from_hass(self) -> None:
+        if self.wheel is not None:
+            self.wheel.discard(self)
+        if self.dispatcher is not None:
+            self.dispatcher.discard(self)
+        await super().async_will_remove_from_hass()
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
-        self.device = self.coordinator.status['hosts_dict'].get(self.mac, {})
-        
+        self.device = self._current_device()
+        self._schedule_dispatch()
+
+    @callback
+    def _schedule_dispatch(self) -> None:
+        """ Registry updates and the state write go through the dispatcher budget """
+        if self.dispatcher is None:
+            self.async_dispatch()
+            return
+
+        self.dispatcher.schedule(self)
+
+    @callback
+    def async_dispatch(self) -> None:
         # Update device name if it has changed
         device_registry = dr.async_get(self.hass)
         if hasattr(self, 'device_id'):
@@ -394,74 +558,13 @@ class TPLinkTracker(CoordinatorEntity, BaseTrackerEntity):
         device_registry = dr.async_get(self.hass)
         
         # Get our device
-        our_device = device_registry.async_get_device({(DOMAIN, self.mac)})
+        our_device = device_registry.async_get(self.device_id)
         if not our_device:
             _LOGGER.warning("Could not find our device for %s", self.mac)
             return
-            
-        _LOGGER.info(
-            "Syncing area for device %s (current area: %s)", 
-            self.mac, 
-            our_device.area_id
-        )
-            
-        # Find matching Nmap device
-        nmap_devices = [
-            d for d in device_registry.devices.values()
-            if any(ident[0] == "nmap_tracker" and ident[1] == self.mac 
-                  for ident in d.identifiers)
-        ]
-        
-        area_id_to_set = None
-        
-        if nmap_devices:
-            nmap_device = nmap_devices[0]
-            _LOGGER.info(
-                "Found matching Nmap device for %s: %s (area_id: %s)", 
-                self.mac, 
-                nmap_device.id, 
-                nmap_device.area_id
-            )
-            
-            # If Nmap device has an area assigned, use that area for our device
-            if nmap_device.area_id:
-                area_id_to_set = nmap_device.area_id
-            else:
-                _LOGGER.info("Nmap device %s has no area assigned", nmap_device.id)
-                
-                # Try to get area from entity registry
-                entity_registry = er.async_get(self.hass)
-                nmap_entities = [
-                    e for e in entity_registry.entities.values()
-                    if e.device_id == nmap_device.id and e.area_id
-                ]
-                
-                if nmap_entities:
-                    area_id_to_set = nmap_entities[0].area_id
-                    _LOGGER.info(
-                        "Found area %s from Nmap entity %s", 
-                        area_id_to_set, 
-                        nmap_entities[0].entity_id
-                    )
-        else:
-            _LOGGER.info("No matching Nmap device found for %s", self.mac)
-            
-            # Try to get area from entity registry directly
-            entity_registry = er.async_get(self.hass)
-            nmap_entities = [
-                e for e in entity_registry.entities.values()
-                if e.unique_id == self.mac and e.platform == "nmap_tracker" and e.area_id
-            ]
-            
-            if nmap_entities:
-                area_id_to_set = nmap_entities[0].area_id
-                _LOGGER.info(
-                    "Found area %s from Nmap entity with MAC %s", 
-                    area_id_to_set, 
-                    self.mac
-                )
         
         # Update device area if needed
+        area_id_to_set = self._nmap_area()
         if area_id_to_set and area_id_to_set != our_device.area_id:
             _LOGGER.info(
                 "Updating device %s area from %s to %s", 
@@ -472,4 +575,4 @@ class TPLinkTracker(CoordinatorEntity, BaseTrackerEntity):
             device_registry.async_update_device(
                 our_device.id, 
                 area_id=area_id_to_set
-            )
\ No newline at end of file
+            )
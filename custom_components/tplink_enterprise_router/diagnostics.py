@@ -0,0 +1,32 @@
+"""Diagnostics support for TP-Link Enterprise Router."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, DATA_SCHEDULER
+from .coordinator import TPLinkEnterpriseRouterCoordinator
+
+TO_REDACT = {"username", "password"}
+
+
+async def async_get_config_entry_diagnostics(
+        hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    coordinator: TPLinkEnterpriseRouterCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    return {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "connection": coordinator.client.connection_stats,
+        "codec": {
+            "name": coordinator.client.codec.name,
+            "decode_ms_p50": coordinator.metrics.percentile("decode", 50),
+            "decode_ms_p95": coordinator.metrics.percentile("decode", 95),
+        },
+        "poll_timing": hass.data[DOMAIN][DATA_SCHEDULER].timings(entry.entry_id),
+        "section_errors": coordinator.section_errors,
+        "metrics": coordinator.metrics.summary(),
+    }
@@ -0,0 +1,100 @@
+"""Spread entity state and registry writes over several loop iterations."""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from homeassistant.components.automation import automations_with_entity
+from homeassistant.core import Event, HomeAssistant, callback
+
+from .metrics import PollMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
+EVENT_AUTOMATION_RELOADED = "automation_reloaded"
+
+
+class StateWriteDispatcher:
+    """Run at most `budget` entity flushes per loop iteration, entities used by automations first.
+
+    An entity queued twice is flushed once with its latest state. Entities implement
+    `async_dispatch()` doing the actual registry updates and state write.
+    """
+
+    def __init__(self, hass: HomeAssistant, metrics: PollMetrics, budget: int) -> None:
+        self.hass = hass
+        self.metrics = metrics
+        """ A negative budget would never drain the queue """
+        self.budget = max(0, budget)
+        """ Dicts as insertion ordered sets """
+        self._priority: dict = {}
+        self._normal: dict = {}
+        self._task: asyncio.Task | None = None
+        self._feeds_automation: dict[str, bool] = {}
+        self._unsub = hass.bus.async_listen(EVENT_AUTOMATION_RELOADED, self._async_automations_reloaded)
+
+    @property
+    def depth(self) -> int:
+        return len(self._priority) + len(self._normal)
+
+    @callback
+    def schedule(self, entity) -> None:
+        """ A budget of 0 writes right away, as before """
+        if not self.budget:
+            entity.async_dispatch()
+            return
+
+        queue = self._priority if self._is_priority(entity.entity_id) else self._normal
+        queue[entity] = None
+
+        if self._task is None:
+            self._task = self.hass.async_create_task(self._async_drain())
+
+    @callback
+    def discard(self, entity) -> None:
+        self._priority.pop(entity, None)
+        self._normal.pop(entity, None)
+
+    @callback
+    def async_stop(self) -> None:
+        self._unsub()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._priority.clear()
+        self._normal.clear()
+
+    async def _async_drain(self) -> None:
+        try:
+            while self._priority or self._normal:
+                self.metrics.record("dispatch_queue_depth", self.depth)
+
+                for _ in range(self.budget):
+                    queue = self._priority or self._normal
+                    if not queue:
+                        break
+
+                    entity = next(iter(queue))
+                    del queue[entity]
+                    try:
+                        entity.async_dispatch()
+                    except Exception as e:
+                        _LOGGER.error("Failed to write state of %s: %s", entity.entity_id, e)
+
+                """ Let the loop run everything else before the next batch """
+                await asyncio.sleep(0)
+        finally:
+            self._task = None
+
+    def _is_priority(self, entity_id: str | None) -> bool:
+        if entity_id is None:
+            return False
+
+        feeds = self._feeds_automation.get(entity_id)
+        if feeds is None:
+            feeds = self._feeds_automation[entity_id] = bool(automations_with_entity(self.hass, entity_id))
+        return feeds
+
+    @callback
+    def _async_automations_reloaded(self, _event: Event) -> None:
+        self._feeds_automation.clear()
@@ -0,0 +1,59 @@
+"""Add and remove entities following keys of the coordinator status."""
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+
+@callback
+def async_track_dynamic_entities(
+        coordinator,
+        entry: ConfigEntry,
+        async_add_entities: AddEntitiesCallback,
+        keys: Callable[[], Iterable[str]],
+        factory: Callable[[str], list[Entity]],
+        on_removed: Callable[[str], None] | None = None,
+        remove_vanished: bool = True,
+) -> None:
+    """ Create entities for new keys and remove those of vanished keys on every coordinator update
+
+    With remove_vanished off, entities stay once created, for keys that come and go with the data.
+    """
+    hass = coordinator.hass
+    tracked: dict[str, list[Entity]] = {}
+
+    @callback
+    def _async_update() -> None:
+        current = set(keys())
+
+        new_entities = []
+        for key in current - tracked.keys():
+            entities = factory(key)
+            tracked[key] = entities
+            new_entities.extend(entities)
+
+        if new_entities:
+            async_add_entities(new_entities)
+
+        removed = tracked.keys() - current
+        if not removed or not remove_vanished:
+            return
+
+        registry = er.async_get(hass)
+        for key in removed:
+            for entity in tracked.pop(key):
+                if entity.entity_id and registry.async_get(entity.entity_id):
+                    registry.async_remove(entity.entity_id)
+                else:
+                    hass.async_create_task(entity.async_remove(force_remove=True))
+
+            if on_removed is not None:
+                on_removed(key)
+
+    _async_update()
+    entry.async_on_unload(coordinator.async_add_listener(_async_update))
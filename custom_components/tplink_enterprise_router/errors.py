@@ -0,0 +1,86 @@
+"""Classified router request errors, messages never carry the payload or the session token."""
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+
+from aiohttp import ClientError, ClientResponseError
+
+from homeassistant.exceptions import IntegrationError
+
+_TOKEN_PATTERN = re.compile(r"stok=[^/]*")
+
+
+def redact_url(url: str) -> str:
+    return _TOKEN_PATTERN.sub("stok=**REDACTED**", url)
+
+
+class RouterRequestError(IntegrationError):
+    """Base of every request failure, still an IntegrationError for existing callers."""
+
+    kind = "request"
+    """ Worth another attempt for an idempotent read """
+    retryable = False
+    """ Counts towards opening the circuit breaker: the router did not answer at all """
+    trips_circuit = False
+
+    def __init__(self, host: str, operation: str, detail: str) -> None:
+        super().__init__(redact_url(f"{operation} request to {host} failed ({self.kind}): {detail}"))
+        self.host = host
+        self.operation = operation
+
+
+class RouterTimeoutError(RouterRequestError):
+    kind = "timeout"
+    retryable = True
+    trips_circuit = True
+
+
+class RouterConnectionError(RouterRequestError):
+    kind = "connection"
+    retryable = True
+    trips_circuit = True
+
+
+class RouterHttpError(RouterRequestError):
+    kind = "http"
+
+    def __init__(self, host: str, operation: str, status: int) -> None:
+        super().__init__(host, operation, f"HTTP {status}")
+        self.status = status
+        self.retryable = status >= 500 or status == 429
+
+
+class RouterResponseError(RouterRequestError):
+    """ The router answered with something that is not valid JSON """
+    kind = "response"
+
+
+class RouterApiError(RouterRequestError):
+    kind = "api"
+
+    def __init__(self, host: str, operation: str, error_code) -> None:
+        super().__init__(host, operation, f"error_code {error_code}")
+        self.error_code = error_code
+
+
+class RouterUnavailableError(RouterRequestError):
+    """ Raised without calling the router while its circuit breaker is open """
+    kind = "circuit_open"
+
+
+def classify_error(error: Exception, host: str, operation: str) -> RouterRequestError | None:
+    """ None for anything that is not a transport or decode failure, those are bugs and must propagate """
+    if isinstance(error, RouterRequestError):
+        return error
+    if isinstance(error, asyncio.TimeoutError):
+        return RouterTimeoutError(host, operation, "no answer before the timeout")
+    if isinstance(error, ClientResponseError):
+        return RouterHttpError(host, operation, error.status)
+    if isinstance(error, ClientError):
+        return RouterConnectionError(host, operation, str(error) or type(error).__name__)
+    if isinstance(error, (json.JSONDecodeError, UnicodeDecodeError)):
+        """ orjson.JSONDecodeError subclasses json.JSONDecodeError """
+        return RouterResponseError(host, operation, "invalid JSON")
+    return None
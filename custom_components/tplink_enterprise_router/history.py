@@ -0,0 +1,119 @@
+"""Bounded in-memory history of the router health metrics."""
+from __future__ import annotations
+
+import time
+from collections import deque
+
+from .const import HISTORY_RAW_SAMPLES, HISTORY_RESOLUTIONS
+
+
+class _Bucket:
+    """Running min / max / sum of every metric falling in one time slot."""
+
+    __slots__ = ("start", "count", "min", "max", "sum")
+
+    def __init__(self, start: int) -> None:
+        self.start = start
+        self.count: dict[str, int] = {}
+        self.min: dict[str, float] = {}
+        self.max: dict[str, float] = {}
+        self.sum: dict[str, float] = {}
+
+    def add(self, values: dict[str, float]) -> None:
+        for name, value in values.items():
+            if name in self.count:
+                self.count[name] += 1
+                self.sum[name] += value
+                if value < self.min[name]:
+                    self.min[name] = value
+                if value > self.max[name]:
+                    self.max[name] = value
+            else:
+                self.count[name] = 1
+                self.sum[name] = self.min[name] = self.max[name] = value
+
+    def as_dict(self, names: set[str] | None = None) -> dict:
+        return {
+            "start": self.start,
+            "metrics": {
+                name: {
+                    "min": self.min[name],
+                    "max": self.max[name],
+                    "avg": round(self.sum[name] / count, 2),
+                    "count": count,
+                }
+                for name, count in self.count.items()
+                if names is None or name in names
+            },
+        }
+
+
+class HealthHistory:
+    """Raw samples in a ring buffer, rolled up incrementally into every resolution as they arrive."""
+
+    def __init__(self) -> None:
+        self._raw: deque[tuple[int, dict[str, float]]] = deque(maxlen=HISTORY_RAW_SAMPLES)
+        self._closed: dict[str, deque[_Bucket]] = {
+            resolution: deque(maxlen=retention)
+            for resolution, (_, retention) in HISTORY_RESOLUTIONS.items()
+        }
+        self._open: dict[str, _Bucket | None] = {resolution: None for resolution in HISTORY_RESOLUTIONS}
+
+    @staticmethod
+    def sample(status: dict) -> dict[str, float]:
+        """ Pick the tracked metrics out of the coordinator status """
+        values = {}
+        for core, usage in (status.get("cpu_core_usage") or {}).items():
+            values[f"cpu_{core}"] = usage
+        for name, key in (("cpu", "cpu_used"), ("memory", "memory_used"), ("host_count", "host_count"),
+                          ("ap_online", "ap_online_count")):
+            value = status.get(key)
+            if value is None:
+                continue
+            try:
+                values[name] = float(value)
+            except (TypeError, ValueError):
+                continue
+        return values
+
+    def record(self, status: dict, timestamp: float | None = None) -> None:
+        values = self.sample(status)
+        if not values:
+            return
+
+        now = int(timestamp if timestamp is not None else time.time())
+        self._raw.append((now, values))
+
+        for resolution, (seconds, _) in HISTORY_RESOLUTIONS.items():
+            start = now - now % seconds
+            bucket = self._open[resolution]
+            if bucket is not None and bucket.start != start:
+                self._closed[resolution].append(bucket)
+                bucket = None
+            if bucket is None:
+                bucket = self._open[resolution] = _Bucket(start)
+            bucket.add(values)
+
+    def raw(self, names: set[str] | None = None, limit: int | None = None) -> list[dict]:
+        samples = list(self._raw)[-limit:] if limit else list(self._raw)
+        return [
+            {"time": ts, "metrics": {k: v for k, v in values.items() if names is None or k in names}}
+            for ts, values in samples
+        ]
+
+    def rollups(self, resolution: str, names: set[str] | None = None, limit: int | None = None,
+                include_open: bool = True) -> list[dict]:
+        buckets = list(self._closed[resolution])
+        if include_open and self._open[resolution] is not None:
+            buckets.append(self._open[resolution])
+        if limit:
+            buckets = buckets[-limit:]
+        return [bucket.as_dict(names) for bucket in buckets]
+
+    def latest(self, name: str) -> dict:
+        """ Last closed bucket of one metric per resolution, small enough for a state attribute """
+        latest = {}
+        for resolution, closed in self._closed.items():
+            if closed and name in closed[-1].count:
+                latest[resolution] = closed[-1].as_dict({name})["metrics"][name]
+        return latest
@@ -0,0 +1,217 @@
+"""In-memory indexes over the host and AP tables, rebuilt once per poll."""
+from __future__ import annotations
+
+import ipaddress
+from bisect import bisect_left, bisect_right
+
+AP_ONLINE_STATUS = "2"
+
+
+def normalize_mac(mac: str) -> str:
+    return mac.strip().upper().replace(":", "-")
+
+
+def _to_int(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _ip_to_int(value) -> int | None:
+    try:
+        return int(ipaddress.IPv4Address(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _prefix_range(keys: list, prefix: str) -> range:
+    """ Positions in a sorted key list whose key starts with prefix """
+    start = bisect_left(keys, prefix)
+    end = bisect_left(keys, prefix + "\uffff", start)
+    return range(start, end)
+
+
+def _page(records: list, sort_key, descending: bool, limit: int | None, offset: int) -> list:
+    if sort_key is not None:
+        records = sorted(records, key=sort_key, reverse=descending)
+
+    end = None if limit is None else offset + limit
+    return records[offset:end]
+
+
+def _group(records: list, field: str) -> dict[str, list[int]]:
+    groups = {}
+    for position, record in enumerate(records):
+        value = record.get(field)
+        if value:
+            groups.setdefault(value, []).append(position)
+
+    return groups
+
+
+class HostIndex:
+    """Lookup structures over the cleaned host list of one poll."""
+
+    SORT_KEYS = {
+        "hostname": lambda host: host.get("hostname", ""),
+        "mac": lambda host: host.get("mac", ""),
+        "ssid": lambda host: host.get("ssid", ""),
+        "ap_name": lambda host: host.get("ap_name", ""),
+        "ip": lambda host: _ip_to_int(host.get("ip")) or 0,
+        "rssi": lambda host: _to_int(host.get("rssi")) or -999,
+        "connect_time": lambda host: _to_int(host.get("connect_time")) or 0,
+    }
+
+    def __init__(
+            self,
+            hosts: list[dict],
+            last_seen: dict[str, float] | None = None,
+            seen_at: float | None = None,
+            retention: float = 0,
+    ) -> None:
+        self.hosts = hosts
+        self.by_mac = {normalize_mac(host["mac"]): host for host in hosts if host.get("mac")}
+
+        """ Last seen times outlive the per-poll index, they are handed over on every rebuild """
+        self.last_seen = {} if last_seen is None else last_seen
+        if seen_at is not None:
+            """ Absent longer than retention (consider_home), nothing reads them anymore """
+            expired = seen_at - retention
+            stale = [mac for mac, seen in self.last_seen.items() if seen < expired]
+            for mac in stale:
+                del self.last_seen[mac]
+            for mac in self.by_mac:
+                self.last_seen[mac] = seen_at
+        self.by_ssid = _group(hosts, "ssid")
+        self.by_ap = _group(hosts, "ap_name")
+        self.by_type = _group(hosts, "type")
+
+        macs = sorted((normalize_mac(host.get("mac", "")), position) for position, host in enumerate(hosts))
+        self._mac_keys = [mac for mac, _ in macs]
+        self._mac_positions = [position for _, position in macs]
+
+        ips = sorted(
+            (ip, position) for position, ip in
+            ((position, _ip_to_int(host.get("ip"))) for position, host in enumerate(hosts)) if ip is not None
+        )
+        self._ip_keys = [ip for ip, _ in ips]
+        self._ip_positions = [position for _, position in ips]
+
+        rssis = sorted(
+            (rssi, position) for position, rssi in
+            ((position, _to_int(host.get("rssi"))) for position, host in enumerate(hosts)) if rssi is not None
+        )
+        self._rssi_keys = [rssi for rssi, _ in rssis]
+        self._rssi_positions = [position for _, position in rssis]
+
+    def get(self, mac: str) -> dict | None:
+        return self.by_mac.get(normalize_mac(mac))
+
+    def query(
+            self,
+            mac_prefix: str | None = None,
+            cidr: str | None = None,
+            ssid: str | None = None,
+            ap_name: str | None = None,
+            host_type: str | None = None,
+            rssi_min: int | None = None,
+            rssi_max: int | None = None,
+            sort_by: str | None = None,
+            descending: bool = False,
+            limit: int | None = None,
+            offset: int = 0,
+    ) -> tuple[int, list[dict]]:
+        """ Intersect the candidate positions of every given filter, smallest set first """
+        candidates = []
+
+        if mac_prefix:
+            positions = _prefix_range(self._mac_keys, normalize_mac(mac_prefix))
+            candidates.append({self._mac_positions[i] for i in positions})
+        if cidr:
+            network = ipaddress.IPv4Network(cidr, strict=False)
+            start = bisect_left(self._ip_keys, int(network.network_address))
+            end = bisect_right(self._ip_keys, int(network.broadcast_address))
+            candidates.append(set(self._ip_positions[start:end]))
+        if ssid:
+            candidates.append(set(self.by_ssid.get(ssid, ())))
+        if ap_name:
+            candidates.append(set(self.by_ap.get(ap_name, ())))
+        if host_type:
+            candidates.append(set(self.by_type.get(host_type, ())))
+        if rssi_min is not None or rssi_max is not None:
+            start = 0 if rssi_min is None else bisect_left(self._rssi_keys, rssi_min)
+            end = len(self._rssi_keys) if rssi_max is None else bisect_right(self._rssi_keys, rssi_max)
+            candidates.append(set(self._rssi_positions[start:end]))
+
+        if candidates:
+            candidates.sort(key=len)
+            positions = set.intersection(*candidates)
+            records = [self.hosts[position] for position in sorted(positions)]
+        else:
+            records = self.hosts
+
+        return len(records), _page(records, self.SORT_KEYS.get(sort_by), descending, limit, offset)
+
+
+class ApIndex:
+    """Lookup structures over the AP list of one poll."""
+
+    SORT_KEYS = {
+        "entry_name": lambda ap: ap.get("entry_name", ""),
+        "mac": lambda ap: ap.get("mac", ""),
+        "status": lambda ap: ap.get("status", ""),
+        "entry_id": lambda ap: _to_int(ap.get("entry_id")) or 0,
+    }
+
+    def __init__(self, ap_list: list[dict]) -> None:
+        self.ap_list = ap_list
+        self.by_entry_id = {ap["entry_id"]: ap for ap in ap_list if ap.get("entry_id")}
+        self.by_mac = {normalize_mac(ap["mac"]): ap for ap in ap_list if ap.get("mac")}
+        """ As reported by the router, entity unique ids are built from these """
+        self.macs = [ap["mac"] for ap in ap_list if ap.get("mac")]
+        self.by_name = _group(ap_list, "entry_name")
+        self.by_status = _group(ap_list, "status")
+
+        macs = sorted((normalize_mac(ap.get("mac", "")), position) for position, ap in enumerate(ap_list))
+        self._mac_keys = [mac for mac, _ in macs]
+        self._mac_positions = [position for _, position in macs]
+
+    def get(self, mac: str) -> dict | None:
+        return self.by_mac.get(normalize_mac(mac))
+
+    def online(self, entry_id: str) -> bool:
+        ap = self.by_entry_id.get(entry_id)
+        return ap is not None and ap.get("status") == AP_ONLINE_STATUS
+
+    def query(
+            self,
+            name: str | None = None,
+            online: bool | None = None,
+            mac_prefix: str | None = None,
+            sort_by: str | None = None,
+            descending: bool = False,
+            limit: int | None = None,
+            offset: int = 0,
+    ) -> tuple[int, list[dict]]:
+        candidates = []
+
+        if name:
+            candidates.append(set(self.by_name.get(name, ())))
+        if online is not None:
+            online_positions = set(self.by_status.get(AP_ONLINE_STATUS, ()))
+            candidates.append(
+                online_positions if online else set(range(len(self.ap_list))) - online_positions
+            )
+        if mac_prefix:
+            positions = _prefix_range(self._mac_keys, normalize_mac(mac_prefix))
+            candidates.append({self._mac_positions[i] for i in positions})
+
+        if candidates:
+            candidates.sort(key=len)
+            positions = set.intersection(*candidates)
+            records = [self.ap_list[position] for position in sorted(positions)]
+        else:
+            records = self.ap_list
+
+        return len(records), _page(records, self.SORT_KEYS.get(sort_by), descending, limit, offset)
@@ -0,0 +1,66 @@
+"""Rolling poll instrumentation."""
+from __future__ import annotations
+
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from .const import DEFAULT_METRICS_WINDOW
+
+
+class PollMetrics:
+    """Keep the last samples of each phase and counter, cheap enough to run on every poll."""
+
+    def __init__(self, window: int = DEFAULT_METRICS_WINDOW) -> None:
+        self._window = window
+        self._samples: dict[str, deque] = {}
+        self.counters: dict[str, int] = {}
+
+    def record(self, name: str, value: float) -> None:
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples[name] = deque(maxlen=self._window)
+        samples.append(value)
+
+    def increment(self, name: str, count: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + count
+
+    @contextmanager
+    def measure(self, name: str):
+        """ Record the duration of the block in milliseconds """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - started) * 1000)
+
+    def last(self, name: str) -> float | None:
+        samples = self._samples.get(name)
+        return samples[-1] if samples else None
+
+    def percentile(self, name: str, percentile: float) -> float | None:
+        samples = self._samples.get(name)
+        if not samples:
+            return None
+
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, round(percentile / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def percentiles(self, percentile: float) -> dict[str, float]:
+        return {name: self.percentile(name, percentile) for name in self._samples}
+
+    def summary(self) -> dict:
+        return {
+            "window": self._window,
+            "samples": {
+                name: {
+                    "count": len(samples),
+                    "last": samples[-1],
+                    "p50": self.percentile(name, 50),
+                    "p95": self.percentile(name, 95),
+                }
+                for name, samples in self._samples.items()
+            },
+            "counters": dict(self.counters),
+        }
@@ -0,0 +1,75 @@
+"""Vendor lookup by MAC prefix from the bundled OUI table."""
+from __future__ import annotations
+
+import os
+from array import array
+from bisect import bisect_left
+
+from homeassistant.core import HomeAssistant
+
+OUI_FILE = os.path.join(os.path.dirname(__file__), "oui.csv")
+
+_INDEX: OuiIndex | None = None
+
+
+def _prefix(mac: str) -> int | None:
+    """ First three octets as a 24 bit integer """
+    digits = mac.replace("-", "").replace(":", "").replace(".", "")
+    try:
+        return int(digits[:6], 16) if len(digits) >= 6 else None
+    except ValueError:
+        return None
+
+
+def is_locally_administered(mac: str) -> bool:
+    """ Randomized / private addresses set the U/L bit of the first octet """
+    prefix = _prefix(mac)
+    return prefix is not None and bool(prefix >> 16 & 0x02)
+
+
+class OuiIndex:
+    """Sorted prefix array searched with bisect, vendor names are shared strings."""
+
+    def __init__(self, rows: list[tuple[int, str]]) -> None:
+        rows.sort()
+        self._prefixes = array("L", (prefix for prefix, _ in rows))
+        self._vendors = tuple(vendor for _, vendor in rows)
+
+    @classmethod
+    def load(cls, path: str = OUI_FILE) -> OuiIndex:
+        rows = {}
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                prefix, _, vendor = line.partition(",")
+                try:
+                    value = int(prefix.strip(), 16)
+                except ValueError:
+                    continue
+                rows[value] = vendor.strip()
+
+        """ Intern so the many entries of one vendor share one string """
+        vendors = {}
+        return cls([(prefix, vendors.setdefault(vendor, vendor)) for prefix, vendor in rows.items()])
+
+    def __len__(self) -> int:
+        return len(self._prefixes)
+
+    def vendor(self, mac: str) -> str | None:
+        prefix = _prefix(mac)
+        if prefix is None or prefix >> 16 & 0x02:
+            return None
+
+        position = bisect_left(self._prefixes, prefix)
+        if position < len(self._prefixes) and self._prefixes[position] == prefix:
+            return self._vendors[position]
+        return None
+
+
+async def async_get_oui_index(hass: HomeAssistant) -> OuiIndex:
+    """ Read the table in the executor the first time, shared by every router afterwards """
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = await hass.async_add_executor_job(OuiIndex.load)
+    return _INDEX
@@ -0,0 +1,104 @@
+"""On demand cProfile capture of coordinator update cycles."""
+from __future__ import annotations
+
+import cProfile
+import io
+import logging
+import pstats
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+PROFILE_REPORT_LINES = 60
+PROFILE_SCOPE_NOTE = (
+    "Scope: everything the event loop ran while the refresh was awaited, including other routers and "
+    "integrations. Work the refresh hands to tasks that finish afterwards (device tracker worker, state "
+    "dispatcher) is not included.\n\n"
+)
+
+
+class CycleProfiler:
+    """Profile the next N refresh cycles of one coordinator and dump the stats to the config directory.
+
+    cProfile hooks the whole interpreter, so only one profile may run at a time across all routers.
+    """
+
+    _running: CycleProfiler | None = None
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self.hass = hass
+        self.entry_id = entry_id
+        self._profile: cProfile.Profile | None = None
+        self._cycles = 0
+        self._remaining = 0
+
+    @property
+    def active(self) -> bool:
+        return self._profile is not None
+
+    def start(self, cycles: int) -> None:
+        running = CycleProfiler._running
+        if running is not None:
+            raise HomeAssistantError(
+                f"Profiling of {running.entry_id} is already running, only one profile can run at a time"
+            )
+
+        CycleProfiler._running = self
+        self._profile = cProfile.Profile()
+        self._cycles = cycles
+        self._remaining = cycles
+        _LOGGER.info("Profiling the next %s update cycles of %s", cycles, self.entry_id)
+
+    async def async_profile_cycle(self, refresh: Callable[[], Awaitable[None]]) -> None:
+        """ Covers get_status, process_data, entity updates and the syslog poll of one refresh, and anything
+        else the loop runs meanwhile """
+        profile = self._profile
+        profile.enable()
+        try:
+            await refresh()
+        finally:
+            profile.disable()
+
+        self._remaining -= 1
+        if self._remaining <= 0:
+            self.async_stop()
+            await self._async_finish(profile)
+
+    @callback
+    def async_stop(self) -> None:
+        """ Drop an unfinished profile, frees the slot for other routers """
+        self._profile = None
+        if CycleProfiler._running is self:
+            CycleProfiler._running = None
+
+    async def _async_finish(self, profile: cProfile.Profile) -> None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = self.hass.config.path(f"{DOMAIN}_profile_{self.entry_id}_{timestamp}.prof")
+
+        await self.hass.async_add_executor_job(self._write_stats, profile, path)
+
+        _LOGGER.info("Profile of %s written to %s", self.entry_id, path)
+        self.hass.bus.async_fire(f"{DOMAIN}_profile_completed", {
+            "entry_id": self.entry_id,
+            "cycles": self._cycles,
+            "path": path,
+            "report_path": f"{path}.txt",
+            "scope": "event_loop",
+        })
+
+    @staticmethod
+    def _write_stats(profile: cProfile.Profile, path: str) -> None:
+        profile.dump_stats(path)
+
+        """ Human readable report next to the pstats file """
+        report = io.StringIO()
+        report.write(PROFILE_SCOPE_NOTE)
+        pstats.Stats(profile, stream=report).sort_stats("cumulative").print_stats(PROFILE_REPORT_LINES)
+        with open(f"{path}.txt", "w", encoding="utf-8") as file:
+            file.write(report.getvalue())
@@ -0,0 +1,234 @@
+"""Per-client roaming and connection history fed by the syslog events."""
+from __future__ import annotations
+
+import zlib
+from array import array
+from datetime import datetime
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, ROAMING_HISTORY_SIZE, ROAMING_MAX_CLIENTS
+from .index import normalize_mac
+
+ROAMING_SAVE_DELAY = 60
+""" Clients are spread over several stores so a save only rewrites the shards that changed """
+ROAMING_SHARDS = 16
+
+KIND_DISCONNECTED = 0
+KIND_CONNECTED = 1
+KIND_ROAMED = 2
+KINDS = ["disconnected", "connected", "roamed"]
+
+
+class _ClientHistory:
+    """Fixed size ring of (timestamp, ap, kind) kept in three typed arrays, AP names are interned."""
+
+    __slots__ = ("times", "aps", "kinds", "head", "size")
+
+    def __init__(self) -> None:
+        self.times = array("L", bytes(array("L").itemsize * ROAMING_HISTORY_SIZE))
+        self.aps = array("H", bytes(array("H").itemsize * ROAMING_HISTORY_SIZE))
+        self.kinds = array("B", bytes(ROAMING_HISTORY_SIZE))
+        self.head = 0
+        self.size = 0
+
+    def append(self, timestamp: int, ap: int, kind: int) -> None:
+        self.times[self.head] = timestamp
+        self.aps[self.head] = ap
+        self.kinds[self.head] = kind
+        self.head = (self.head + 1) % ROAMING_HISTORY_SIZE
+        self.size = min(self.size + 1, ROAMING_HISTORY_SIZE)
+
+    def last_time(self) -> int | None:
+        return self.times[self.head - 1] if self.size else None
+
+    def __iter__(self):
+        """ Oldest first """
+        start = (self.head - self.size) % ROAMING_HISTORY_SIZE
+        for i in range(self.size):
+            position = (start + i) % ROAMING_HISTORY_SIZE
+            yield self.times[position], self.aps[position], self.kinds[position]
+
+
+def _store_key(entry_id: str) -> str:
+    return f"{DOMAIN}_{entry_id}_roaming"
+
+
+def _shard(mac: str) -> int:
+    return zlib.crc32(mac.encode()) % ROAMING_SHARDS
+
+
+async def async_remove_roaming(hass: HomeAssistant, entry_id: str) -> None:
+    for shard in range(ROAMING_SHARDS):
+        await Store(hass, version=1, key=f"{_store_key(entry_id)}_{shard}").async_remove()
+
+
+class RoamingHistory:
+    """Bounded transition history of every wireless client of one router."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._stores = [
+            Store(hass, version=1, key=f"{_store_key(entry_id)}_{shard}") for shard in range(ROAMING_SHARDS)
+        ]
+        """ AP code 0 stands for no AP (disconnected), codes are only ever appended """
+        self._ap_names: list[str] = [""]
+        self._ap_codes: dict[str, int] = {"": 0}
+        """ Least recently changed first, so the oldest clients are dropped past ROAMING_MAX_CLIENTS """
+        self.clients: dict[str, _ClientHistory] = {}
+        """ Flattened history and summary of each client, dropped when the client changes """
+        self._flat: dict[str, list[int]] = {}
+        self._summaries: dict[str, tuple[dict, str, int]] = {}
+        self._members: list[set[str]] = [set() for _ in range(ROAMING_SHARDS)]
+        """ Shards with a save already scheduled, further changes are written with it """
+        self._pending: set[int] = set()
+
+    async def async_load(self) -> None:
+        shards = [await store.async_load() or {} for store in self._stores]
+
+        """ Every shard saved a prefix of the same append-only AP list, the longest is the latest """
+        self._ap_names = max((shard.get("aps") or [""] for shard in shards), key=len)
+        self._ap_codes = {name: code for code, name in enumerate(self._ap_names)}
+        loaded = {}
+        for shard in shards:
+            for mac, flat in shard.get("clients", {}).items():
+                history = loaded[mac] = _ClientHistory()
+                for i in range(0, len(flat), 3):
+                    history.append(flat[i], flat[i + 1], flat[i + 2])
+
+        for mac in sorted(loaded, key=lambda mac: loaded[mac].last_time() or 0):
+            self.clients[mac] = loaded[mac]
+            self._members[_shard(mac)].add(mac)
+        self._evict()
+
+    def record(self, mac: str, timestamp: str, kind: int, ap_name: str = "") -> None:
+        """ Timestamps are the router's local syslog time, older lines than the last one are ignored """
+        try:
+            ts = int(datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+                     .replace(tzinfo=dt_util.DEFAULT_TIME_ZONE).timestamp())
+        except ValueError:
+            return
+
+        mac = normalize_mac(mac)
+        history = self.clients.pop(mac, None)
+        if history is None:
+            history = _ClientHistory()
+            self._members[_shard(mac)].add(mac)
+        elif history.last_time() is not None and ts < history.last_time():
+            self.clients[mac] = history
+            return
+
+        """ Reinserted last, the order follows the latest change """
+        self.clients[mac] = history
+        history.append(ts, self._ap_code(ap_name if kind != KIND_DISCONNECTED else ""), kind)
+        self._flat.pop(mac, None)
+        self._summaries.pop(mac, None)
+        self._schedule_save(_shard(mac))
+        self._evict()
+
+    def events(self, mac: str, limit: int | None = None) -> list[dict]:
+        history = self.clients.get(normalize_mac(mac))
+        if history is None:
+            return []
+
+        events = [
+            {"time": dt_util.utc_from_timestamp(ts).isoformat(), "ap_name": self._ap_names[ap], "event": KINDS[kind]}
+            for ts, ap, kind in history
+        ]
+        return events[-limit:] if limit else events
+
+    def summary(self, mac: str, now: float | None = None) -> dict | None:
+        """ Cached until the next event of the client, only the time on the current AP is added per call """
+        mac = normalize_mac(mac)
+        cached = self._summaries.get(mac)
+        if cached is None:
+            history = self.clients.get(mac)
+            if history is None:
+                return None
+            cached = self._summaries[mac] = self._summarize(history)
+
+        summary, current_ap, since = cached
+        if not current_ap:
+            return summary
+
+        now = int(now if now is not None else dt_util.utcnow().timestamp())
+        time_per_ap = dict(summary["time_per_ap"])
+        time_per_ap[current_ap] = time_per_ap.get(current_ap, 0) + max(0, now - since)
+        return {**summary, "time_per_ap": time_per_ap}
+
+    def _summarize(self, history: _ClientHistory) -> tuple[dict, str, int]:
+        """ Summary up to the last event, with the AP still being counted and since when """
+        roam_count = 0
+        connect_count = 0
+        time_per_ap: dict[str, int] = {}
+        sessions: list[int] = []
+        session_start = None
+        previous = None
+
+        for ts, ap, kind in history:
+            if previous is not None and previous[1]:
+                name = self._ap_names[previous[1]]
+                time_per_ap[name] = time_per_ap.get(name, 0) + ts - previous[0]
+
+            if kind == KIND_ROAMED:
+                roam_count += 1
+                if session_start is None:
+                    session_start = ts
+            elif kind == KIND_CONNECTED:
+                connect_count += 1
+                session_start = ts
+            elif session_start is not None:
+                sessions.append(ts - session_start)
+                session_start = None
+
+            previous = (ts, ap)
+
+        current_ap = self._ap_names[previous[1]] if previous else ""
+        summary = {
+            "roam_count": roam_count,
+            "connect_count": connect_count,
+            "current_ap": current_ap,
+            "last_change": dt_util.utc_from_timestamp(previous[0]).isoformat() if previous else None,
+            "connected_since": dt_util.utc_from_timestamp(session_start).isoformat() if session_start else None,
+            "time_per_ap": time_per_ap,
+            "session_lengths": sessions,
+        }
+        """ The current AP keeps counting until now """
+        return summary, current_ap, previous[0] if previous else 0
+
+    def _ap_code(self, name: str) -> int:
+        code = self._ap_codes.get(name)
+        if code is None:
+            code = self._ap_codes[name] = len(self._ap_names)
+            self._ap_names.append(name)
+        return code
+
+    def _evict(self) -> None:
+        while len(self.clients) > ROAMING_MAX_CLIENTS:
+            mac = next(iter(self.clients))
+            del self.clients[mac]
+            self._members[_shard(mac)].discard(mac)
+            self._flat.pop(mac, None)
+            self._summaries.pop(mac, None)
+            self._schedule_save(_shard(mac))
+
+    def _schedule_save(self, shard: int) -> None:
+        """ Write at most ROAMING_SAVE_DELAY after the first change, re-arming on every event would
+        push the save back for as long as clients keep roaming """
+        if shard in self._pending:
+            return
+        self._pending.add(shard)
+        self._stores[shard].async_delay_save(lambda: self._shard_data(shard), ROAMING_SAVE_DELAY)
+
+    def _shard_data(self, shard: int) -> dict:
+        """ Unchanged clients reuse their flattened history """
+        self._pending.discard(shard)
+        clients = {}
+        for mac in self._members[shard]:
+            flat = self._flat.get(mac)
+            if flat is None:
+                flat = self._flat[mac] = [value for event in self.clients[mac] for value in event]
+            clients[mac] = flat
+
+        return {"aps": self._ap_names, "clients": clients}
@@ -0,0 +1,146 @@
+"""Domain level poll scheduler shared by all routers."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from functools import partial
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+
+from .const import DEFAULT_MAX_CONCURRENT_POLLS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PollScheduler:
+    """Spread coordinator ticks over their interval and cap concurrent polls."""
+
+    def __init__(self, hass: HomeAssistant, max_concurrent: int = DEFAULT_MAX_CONCURRENT_POLLS) -> None:
+        self.hass = hass
+        self.max_concurrent = max_concurrent
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._coordinators = {}
+        self._unsubs: dict[str, CALLBACK_TYPE] = {}
+        """ Position of each router within its interval, as a fraction of the interval """
+        self._phases: dict[str, float] = {}
+        self._epoch = time.monotonic()
+        self._in_flight = set()
+        self._timings = {}
+
+    @callback
+    def async_register(self, coordinator) -> None:
+        entry_id = coordinator.entry.entry_id
+        self._coordinators[entry_id] = coordinator
+        self._timings[entry_id] = {
+            "offset": 0.0,
+            "polls": 0,
+            "skipped": 0,
+            "last_wait": None,
+            "last_duration": None,
+            "max_duration": None,
+            "total_duration": 0.0,
+        }
+        self._schedule(entry_id)
+
+    @callback
+    def async_unregister(self, entry_id: str) -> None:
+        """ The other routers keep their timers and phase """
+        unsub = self._unsubs.pop(entry_id, None)
+        if unsub is not None:
+            unsub()
+        self._coordinators.pop(entry_id, None)
+        self._timings.pop(entry_id, None)
+        self._phases.pop(entry_id, None)
+
+    def timings(self, entry_id: str) -> dict:
+        timing = self._timings.get(entry_id)
+        if timing is None:
+            return {}
+
+        return {
+            **timing,
+            "average_duration": timing["total_duration"] / timing["polls"] if timing["polls"] else None,
+            "routers": len(self._coordinators),
+            "max_concurrent": self.max_concurrent,
+        }
+
+    def _free_phase(self) -> float:
+        """ Middle of the largest gap between the phases already taken """
+        phases = sorted(self._phases.values())
+        if not phases:
+            return 0.0
+
+        gap, start = max(
+            ((phases[(index + 1) % len(phases)] - phase) % 1.0 or 1.0, phase)
+            for index, phase in enumerate(phases)
+        )
+        return (start + gap / 2) % 1.0
+
+    @callback
+    def _schedule(self, entry_id: str) -> None:
+        """ Start the first tick of a new router at its own slot, without touching the others """
+        unsub = self._unsubs.pop(entry_id, None)
+        if unsub is not None:
+            unsub()
+        self._phases.pop(entry_id, None)
+
+        phase = self._phases[entry_id] = self._free_phase()
+        interval = self._coordinators[entry_id].poll_interval.total_seconds()
+        offset = phase * interval
+        self._timings[entry_id]["offset"] = offset
+
+        """ Slots are relative to a shared epoch, the next one is always in the future """
+        delay = (offset - (time.monotonic() - self._epoch)) % interval or interval
+        self._unsubs[entry_id] = async_call_later(self.hass, delay, partial(self._start, entry_id))
+
+    @callback
+    def _start(self, entry_id: str, _now) -> None:
+        coordinator = self._coordinators.get(entry_id)
+        if coordinator is None:
+            return
+
+        self._unsubs[entry_id] = async_track_time_interval(
+            self.hass, partial(self._tick, entry_id), coordinator.poll_interval
+        )
+        self._tick(entry_id, _now)
+
+    @callback
+    def _tick(self, entry_id: str, _now) -> None:
+        coordinator = self._coordinators.get(entry_id)
+        if coordinator is not None:
+            self.hass.async_create_task(self.async_poll(coordinator))
+
+    async def async_poll(self, coordinator) -> None:
+        entry_id = coordinator.entry.entry_id
+        timing = self._timings.get(entry_id)
+
+        """ Skip the tick if the previous poll of this router is still running """
+        if entry_id in self._in_flight:
+            if timing is not None:
+                timing["skipped"] += 1
+            return
+
+        self._in_flight.add(entry_id)
+        try:
+            queued = time.monotonic()
+            async with self._semaphore:
+                started = time.monotonic()
+                await coordinator.async_refresh()
+                finished = time.monotonic()
+        finally:
+            self._in_flight.discard(entry_id)
+
+        if timing is None:
+            return
+
+        duration = finished - started
+        timing["polls"] += 1
+        timing["last_wait"] = started - queued
+        timing["last_duration"] = duration
+        timing["max_duration"] = max(timing["max_duration"] or 0.0, duration)
+        timing["total_duration"] += duration
+        _LOGGER.debug(
+            "Polled %s in %.3fs (waited %.3fs for a slot)", coordinator.host, duration, timing["last_wait"]
+        )
@@ -9,13 +9,18 @@ from homeassistant.components.sensor import (
     SensorEntityDescription,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import PERCENTAGE
+from homeassistant.const import PERCENTAGE, UnitOfTime
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import slugify
 
+from .ap_entity import TPLinkEnterpriseRouterApEntity
 from .const import DOMAIN
 from .coordinator import TPLinkEnterpriseRouterCoordinator
+from .dynamic_entity import async_track_dynamic_entities
 
 
 @dataclass
@@ -28,7 +33,10 @@ class TPLinkEnterpriseRouterSensorRequiredKeysMixin:
 class TPLinkEnterpriseRouterSensorEntityDescription(
     SensorEntityDescription, TPLinkEnterpriseRouterSensorRequiredKeysMixin
 ):
-    pass
+    """ Name of the HealthHistory metric whose rollups are added as the history attribute """
+    history: str | None = None
+    """ Used for the unique id instead of `key` when `key` is slugified from a router value """
+    unique_key: str | None = None
 
 
 SENSOR_TYPES: tuple[TPLinkEnterpriseRouterSensorEntityDescription, ...] = (
@@ -40,8 +48,7 @@ SENSOR_TYPES: tuple[TPLinkEnterpriseRouterSensorEntityDescription, ...] = (
         state_class=SensorStateClass.TOTAL,
         value=lambda status: status['wireless_host_count'],
         attrs=lambda status: {
-            "hosts": status['wireless_hosts'],
-            "ap_connected_hosts": status['ap_connected_hosts'],
+            "ap_host_count": status['ap_host_count'],
         }
     ),
     TPLinkEnterpriseRouterSensorEntityDescription(
@@ -51,9 +58,7 @@ SENSOR_TYPES: tuple[TPLinkEnterpriseRouterSensorEntityDescription, ...] = (
         icon="mdi:cable-data",
         state_class=SensorStateClass.TOTAL,
         value=lambda status: status['wired_host_count'],
-        attrs=lambda status: {
-            "hosts": status['wired_hosts'],
-        }
+        attrs=lambda status: {}
     ),
     TPLinkEnterpriseRouterSensorEntityDescription(
         key="clients_total",
@@ -63,9 +68,9 @@ SENSOR_TYPES: tuple[TPLinkEnterpriseRouterSensorEntityDescription, ...] = (
         state_class=SensorStateClass.TOTAL,
         value=lambda status: status['host_count'],
         attrs=lambda status: {
-            "hosts": status['hosts'],
             "ssid_host_count": status['ssid_host_count'],
-        }
+        },
+        history="host_count",
     ),
     TPLinkEnterpriseRouterSensorEntityDescription(
         key="cpu_used",
@@ -76,7 +81,8 @@ SENSOR_TYPES: tuple[TPLinkEnterpriseRouterSensorEntityDescription, ...] = (
         native_unit_of_measurement=PERCENTAGE,
         suggested_display_precision=1,
         value=lambda status: status['cpu_used'],
-        attrs=lambda status: {}
+        attrs=lambda status: {},
+        history="cpu",
     ),
     TPLinkEnterpriseRouterSensorEntityDescription(
         key="memory_used",
@@ -87,7 +93,8 @@ SENSOR_TYPES: tuple[TPLinkEnterpriseRouterSensorEntityDescription, ...] = (
         native_unit_of_measurement=PERCENTAGE,
         suggested_display_precision=1,
         value=lambda status: status['memory_used'],
-        attrs=lambda status: {}
+        attrs=lambda status: {},
+        history="memory",
     ),
     TPLinkEnterpriseRouterSensorEntityDescription(
         key="wan_count",
@@ -103,9 +110,7 @@ SENSOR_TYPES: tuple[TPLinkEnterpriseRouterSensorEntityDescription, ...] = (
         translation_key="ap_count",
         icon="mdi:access-point",
         value=lambda status: status['ap_count'],
-        attrs=lambda status: {
-            "list": status['ap_list'],
-        }
+        attrs=lambda status: {}
     ),
     TPLinkEnterpriseRouterSensorEntityDescription(
         key="ap_online_count",
@@ -113,9 +118,8 @@ SENSOR_TYPES: tuple[TPLinkEnterpriseRouterSensorEntityDescription, ...] = (
         translation_key="ap_online_count",
         icon="mdi:access-point-check",
         value=lambda status: status['ap_online_count'],
-        attrs=lambda status: {
-            "list": status['ap_online_list'],
-        }
+        attrs=lambda status: {},
+        history="ap_online",
     ),
 TPLinkEnterpriseRouterSensorEntityDescription(
         key="ap_offline_count",
@@ -124,11 +128,54 @@ TPLinkEnterpriseRouterSensorEntityDescription(
         icon="mdi:access-point-remove",
         value=lambda status: status['ap_offline_count'],
         attrs=lambda status: {
-            "list": status['ap_offline_list'],
+            "names": [ap.get('entry_name') for ap in status['ap_offline_list']],
         }
     ),
 )
 
+""" Samples that are counts or sizes, every other metric is a duration in milliseconds """
+METRIC_SAMPLE_NAMES = frozenset({"host_count", "ap_count", "response_bytes", "dispatch_queue_depth", "streamed_records"})
+
+
+def _metric_attributes(metrics, percentile: float, counters: bool = False) -> dict[str, Any]:
+    values = metrics.percentiles(percentile)
+    attrs = {
+        "phases_ms": {name: value for name, value in values.items() if name not in METRIC_SAMPLE_NAMES},
+        "samples": {name: value for name, value in values.items() if name in METRIC_SAMPLE_NAMES},
+    }
+    if counters:
+        attrs["counters"] = dict(metrics.counters)
+    return attrs
+
+
+""" Sensors reading the rolling poll metrics instead of the router status """
+DIAGNOSTIC_SENSOR_TYPES: tuple[TPLinkEnterpriseRouterSensorEntityDescription, ...] = (
+    TPLinkEnterpriseRouterSensorEntityDescription(
+        key="poll_duration_p50",
+        name="Poll Duration P50",
+        translation_key="poll_duration_p50",
+        icon="mdi:timer-outline",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        suggested_display_precision=0,
+        value=lambda metrics: metrics.percentile("poll", 50),
+        attrs=lambda metrics: _metric_attributes(metrics, 50, counters=True)
+    ),
+    TPLinkEnterpriseRouterSensorEntityDescription(
+        key="poll_duration_p95",
+        name="Poll Duration P95",
+        translation_key="poll_duration_p95",
+        icon="mdi:timer-alert-outline",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        suggested_display_precision=0,
+        value=lambda metrics: metrics.percentile("poll", 95),
+        attrs=lambda metrics: _metric_attributes(metrics, 95)
+    ),
+)
+
 
 async def async_setup_entry(
         hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
@@ -140,6 +187,9 @@ async def async_setup_entry(
     for description in SENSOR_TYPES:
         sensors.append(TPLinkEnterpriseRouterSensor(coordinator, description))
 
+    for description in DIAGNOSTIC_SENSOR_TYPES:
+        sensors.append(TPLinkEnterpriseRouterDiagnosticSensor(coordinator, description))
+
     """ Create dynamic Wan sensors """
     wan_states = coordinator.status.get("wan_states", [])
     for wan_state in wan_states:
@@ -158,11 +208,74 @@ async def async_setup_entry(
 
     async_add_entities(sensors, False)
 
+    """ Per-SSID and per-band client count sensors, counted in the single host pass of process_data """
+    async_track_dynamic_entities(
+        coordinator,
+        entry,
+        async_add_entities,
+        keys=lambda: {
+            *(ssid.get("ssid") for ssid in coordinator.status.get("ssid_list", []) if ssid.get("ssid")),
+            *coordinator.status.get("ssid_client_count", {}),
+        },
+        factory=lambda ssid: [TPLinkEnterpriseRouterSensor(coordinator, _client_count_description(
+            "ssid_client_count", ssid, f"SSID {ssid} Clients", "mdi:wifi"))],
+    )
+    """ A band is only reported while it has clients, its sensor stays and reads 0 when it empties """
+    known_bands = _registered_keys(hass, entry, "band_client_count", coordinator.unique_id)
+    async_track_dynamic_entities(
+        coordinator,
+        entry,
+        async_add_entities,
+        keys=lambda: {*known_bands, *coordinator.status.get("band_client_count", {})},
+        factory=lambda band: [TPLinkEnterpriseRouterSensor(coordinator, _client_count_description(
+            "band_client_count", band, f"{band} Clients", "mdi:access-point"))],
+        remove_vanished=False,
+    )
+
+    """ Per-AP client count sensors """
+    if entry.data.get("enable_ap_entities", False):
+        async_track_dynamic_entities(
+            coordinator,
+            entry,
+            async_add_entities,
+            keys=lambda: coordinator.ap_index.macs,
+            factory=lambda mac: [TPLinkApClientsSensor(coordinator, mac)],
+        )
+
+
+def _client_count_description(
+        status_key: str, key: str, name: str, icon: str
+) -> TPLinkEnterpriseRouterSensorEntityDescription:
+    """ Keys without clients this poll read as 0 """
+    return TPLinkEnterpriseRouterSensorEntityDescription(
+        key=f"{status_key}_{slugify(key)}",
+        unique_key=f"{status_key}_{key}",
+        name=name,
+        icon=icon,
+        state_class=SensorStateClass.MEASUREMENT,
+        value=lambda status: status.get(status_key, {}).get(key, 0),
+        attrs=lambda status: {},
+    )
+
+
+def _registered_keys(hass: HomeAssistant, entry: ConfigEntry, status_key: str, router_id: str) -> set[str]:
+    """ Raw keys of the client count sensors created by earlier runs """
+    prefix = f"{DOMAIN}_{status_key}_"
+    suffix = f"_{router_id}"
+    return {
+        entity.unique_id[len(prefix):-len(suffix)]
+        for entity in er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id)
+        if entity.domain == "sensor" and entity.unique_id.startswith(prefix) and entity.unique_id.endswith(suffix)
+    }
+
 
 class TPLinkEnterpriseRouterSensor(
     CoordinatorEntity[TPLinkEnterpriseRouterCoordinator], SensorEntity
 ):
     entity_description: TPLinkEnterpriseRouterSensorEntityDescription
+    """ Summaries grow with the number of APs, full lists are served by get_hosts / get_aps """
+    _unrecorded_attributes = frozenset({"ap_host_count", "names", "history"})
+    _skip_unchanged = True
 
     def __init__(
             self,
@@ -172,16 +285,61 @@ class TPLinkEnterpriseRouterSensor(
         super().__init__(coordinator)
 
         self.entity_id = f"sensor.{DOMAIN}_{description.key}_{coordinator.unique_id}"
-        self._attr_unique_id = f"{DOMAIN}_{description.key}_{coordinator.unique_id}"
+        self._attr_unique_id = f"{DOMAIN}_{description.unique_key or description.key}_{coordinator.unique_id}"
         self._attr_device_info = coordinator.device_info
         self.entity_description = description
         self._attr_has_entity_name = True
-        self._attr_native_value = self.entity_description.value(self.coordinator.status)
-        self._attr_extra_state_attributes = self.entity_description.attrs(self.coordinator.status)
+        self._attr_native_value = self.entity_description.value(self._source())
+        self._attr_extra_state_attributes = self._build_attributes()
+        self._seen = self._status_key()
+
+    def _status_key(self) -> tuple:
+        return self.coordinator.status.key, self.coordinator.last_update_success
 
     @callback
     def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self._attr_native_value = self.entity_description.value(self.coordinator.status)
-        self._attr_extra_state_attributes = self.entity_description.attrs(self.coordinator.status)
+        """Handle updated data from the coordinator, skipping notifications that changed nothing."""
+        if self._skip_unchanged and self._seen == self._status_key():
+            return
+        self._seen = self._status_key()
+
+        self._attr_native_value = self.entity_description.value(self._source())
+        self._attr_extra_state_attributes = self._build_attributes()
         self.async_write_ha_state()
+
+    def _source(self) -> Any:
+        return self.coordinator.status
+
+    def _build_attributes(self) -> dict[str, Any]:
+        attrs = self.entity_description.attrs(self._source())
+
+        if self.entity_description.history is not None:
+            attrs = {**attrs, "history": self.coordinator.history.latest(self.entity_description.history)}
+
+        """ Mark values coming from the restored snapshot """
+        if self.coordinator.restored:
+            return {**attrs, "restored": True}
+
+        return attrs
+
+
+class TPLinkEnterpriseRouterDiagnosticSensor(TPLinkEnterpriseRouterSensor):
+    """ Change on every poll, kept out of the recorder """
+    _unrecorded_attributes = frozenset({"phases_ms", "samples", "counters"})
+    _skip_unchanged = False
+
+    def _source(self) -> Any:
+        return self.coordinator.metrics
+
+
+class TPLinkApClientsSensor(TPLinkEnterpriseRouterApEntity, SensorEntity):
+    _attr_icon = "mdi:account-multiple"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, coordinator: TPLinkEnterpriseRouterCoordinator, mac: str) -> None:
+        super().__init__(coordinator, mac, "sensor", "ap_clients")
+
+    @property
+    def native_value(self) -> int:
+        """ Counted once per poll by AP name in process_data """
+        return self.coordinator.status.get("ap_host_count", {}).get(self.ap.get("entry_name"), 0)
@@ -0,0 +1,304 @@
+"""Services of the integration."""
+from __future__ import annotations
+
+import ipaddress
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+
+from .const import DOMAIN, HISTORY_RESOLUTIONS, DEFAULT_AP_REBOOT_ONLINE_TIMEOUT, DEFAULT_AP_REBOOT_MAX_FAILURES
+from .coordinator import TPLinkEnterpriseRouterCoordinator
+from .index import ApIndex, HostIndex
+from .ssid_schedule import WEEKDAYS
+
+SERVICE_PROFILE = "profile"
+SERVICE_GET_HOSTS = "get_hosts"
+SERVICE_GET_APS = "get_aps"
+SERVICE_SET_SSIDS = "set_ssids"
+SERVICE_SET_SSID_SCHEDULE = "set_ssid_schedule"
+SERVICE_ROLLING_REBOOT_AP = "rolling_reboot_ap"
+SERVICE_GET_HISTORY = "get_history"
+SERVICE_GET_ROAMING_HISTORY = "get_roaming_history"
+
+ATTR_ENTRY_ID = "entry_id"
+ATTR_CYCLES = "cycles"
+ATTR_MAC_PREFIX = "mac_prefix"
+ATTR_IP = "ip"
+ATTR_SSID = "ssid"
+ATTR_AP_NAME = "ap_name"
+ATTR_TYPE = "type"
+ATTR_RSSI_MIN = "rssi_min"
+ATTR_RSSI_MAX = "rssi_max"
+ATTR_NAME = "name"
+ATTR_ONLINE = "online"
+ATTR_SORT_BY = "sort_by"
+ATTR_DESCENDING = "descending"
+ATTR_LIMIT = "limit"
+ATTR_OFFSET = "offset"
+ATTR_SSIDS = "ssids"
+ATTR_SSID_NAME = "ssid"
+ATTR_ENABLE = "enable"
+ATTR_RULES = "rules"
+ATTR_AT = "at"
+ATTR_WEEKDAYS = "weekdays"
+ATTR_NAMES = "names"
+ATTR_GROUPS = "groups"
+ATTR_BATCH_SIZE = "batch_size"
+ATTR_ONLINE_TIMEOUT = "online_timeout"
+ATTR_MAX_FAILURES = "max_failures"
+ATTR_REBOOT_ROUTER = "reboot_router"
+ATTR_RESOLUTION = "resolution"
+ATTR_METRICS = "metrics"
+ATTR_MAC = "mac"
+ATTR_EVENTS = "events"
+
+PROFILE_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_ENTRY_ID): cv.string,
+    vol.Optional(ATTR_CYCLES, default=3): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+})
+
+
+def _cidr(value) -> str:
+    try:
+        return str(ipaddress.IPv4Network(cv.string(value), strict=False))
+    except ValueError as e:
+        raise vol.Invalid(f"Invalid IP or CIDR: {value}") from e
+
+
+PAGINATION_SCHEMA = {
+    vol.Optional(ATTR_ENTRY_ID): cv.string,
+    vol.Optional(ATTR_DESCENDING, default=False): cv.boolean,
+    vol.Optional(ATTR_LIMIT, default=100): vol.All(vol.Coerce(int), vol.Range(min=1, max=5000)),
+    vol.Optional(ATTR_OFFSET, default=0): vol.All(vol.Coerce(int), vol.Range(min=0)),
+}
+
+GET_HOSTS_SCHEMA = vol.Schema({
+    **PAGINATION_SCHEMA,
+    vol.Optional(ATTR_MAC_PREFIX): cv.string,
+    vol.Optional(ATTR_IP): _cidr,
+    vol.Optional(ATTR_SSID): cv.string,
+    vol.Optional(ATTR_AP_NAME): cv.string,
+    vol.Optional(ATTR_TYPE): vol.In(["wireless", "wired"]),
+    vol.Optional(ATTR_RSSI_MIN): vol.Coerce(int),
+    vol.Optional(ATTR_RSSI_MAX): vol.Coerce(int),
+    vol.Optional(ATTR_SORT_BY): vol.In(list(HostIndex.SORT_KEYS)),
+})
+
+GET_APS_SCHEMA = vol.Schema({
+    **PAGINATION_SCHEMA,
+    vol.Optional(ATTR_NAME): cv.string,
+    vol.Optional(ATTR_ONLINE): cv.boolean,
+    vol.Optional(ATTR_MAC_PREFIX): cv.string,
+    vol.Optional(ATTR_SORT_BY): vol.In(list(ApIndex.SORT_KEYS)),
+})
+
+SET_SSIDS_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_ENTRY_ID): cv.string,
+    vol.Required(ATTR_SSIDS): vol.All(cv.ensure_list, [vol.Schema({
+        vol.Required(ATTR_SSID_NAME): cv.string,
+        vol.Required(ATTR_ENABLE): cv.boolean,
+    })]),
+})
+
+
+def _time(value) -> str:
+    return cv.time(value).strftime("%H:%M")
+
+
+SET_SSID_SCHEDULE_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_ENTRY_ID): cv.string,
+    vol.Required(ATTR_RULES): vol.All(cv.ensure_list, [vol.Schema({
+        vol.Required(ATTR_SSIDS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Required(ATTR_ENABLE): cv.boolean,
+        vol.Required(ATTR_AT): _time,
+        vol.Optional(ATTR_WEEKDAYS, default=WEEKDAYS): vol.All(cv.ensure_list, [vol.In(WEEKDAYS)]),
+    })]),
+})
+
+ROLLING_REBOOT_AP_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_ENTRY_ID): cv.string,
+    vol.Optional(ATTR_NAMES): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(ATTR_GROUPS): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(ATTR_BATCH_SIZE, default=1): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    vol.Optional(ATTR_ONLINE_TIMEOUT, default=DEFAULT_AP_REBOOT_ONLINE_TIMEOUT): vol.All(
+        vol.Coerce(int), vol.Range(min=30)
+    ),
+    vol.Optional(ATTR_MAX_FAILURES, default=DEFAULT_AP_REBOOT_MAX_FAILURES): vol.All(
+        vol.Coerce(int), vol.Range(min=0)
+    ),
+    vol.Optional(ATTR_REBOOT_ROUTER, default=False): cv.boolean,
+})
+
+
+GET_HISTORY_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_ENTRY_ID): cv.string,
+    vol.Optional(ATTR_RESOLUTION, default="1m"): vol.In(["raw", *HISTORY_RESOLUTIONS]),
+    vol.Optional(ATTR_METRICS): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(ATTR_LIMIT): vol.All(vol.Coerce(int), vol.Range(min=1)),
+})
+
+GET_ROAMING_HISTORY_SCHEMA = vol.Schema({
+    **PAGINATION_SCHEMA,
+    vol.Optional(ATTR_MAC): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(ATTR_EVENTS, default=False): cv.boolean,
+})
+
+
+def get_coordinator(hass: HomeAssistant, call: ServiceCall) -> TPLinkEnterpriseRouterCoordinator:
+    """ Resolve the target router, entry_id may be omitted when only one router is configured """
+    coordinators = {
+        entry_id: coordinator
+        for entry_id, coordinator in hass.data.get(DOMAIN, {}).items()
+        if isinstance(coordinator, TPLinkEnterpriseRouterCoordinator)
+    }
+
+    entry_id = call.data.get(ATTR_ENTRY_ID)
+    if entry_id is None and len(coordinators) == 1:
+        return next(iter(coordinators.values()))
+
+    if entry_id not in coordinators:
+        raise HomeAssistantError(f"Unknown or ambiguous router entry: {entry_id}")
+
+    return coordinators[entry_id]
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    async def async_profile(call: ServiceCall) -> None:
+        get_coordinator(hass, call).profiler.start(call.data[ATTR_CYCLES])
+
+    async def async_get_hosts(call: ServiceCall) -> ServiceResponse:
+        total, hosts = get_coordinator(hass, call).host_index.query(
+            mac_prefix=call.data.get(ATTR_MAC_PREFIX),
+            cidr=call.data.get(ATTR_IP),
+            ssid=call.data.get(ATTR_SSID),
+            ap_name=call.data.get(ATTR_AP_NAME),
+            host_type=call.data.get(ATTR_TYPE),
+            rssi_min=call.data.get(ATTR_RSSI_MIN),
+            rssi_max=call.data.get(ATTR_RSSI_MAX),
+            sort_by=call.data.get(ATTR_SORT_BY),
+            descending=call.data[ATTR_DESCENDING],
+            limit=call.data[ATTR_LIMIT],
+            offset=call.data[ATTR_OFFSET],
+        )
+
+        return {
+            "total": total,
+            "offset": call.data[ATTR_OFFSET],
+            "hosts": hosts,
+        }
+
+    async def async_get_aps(call: ServiceCall) -> ServiceResponse:
+        coordinator = get_coordinator(hass, call)
+        total, aps = coordinator.ap_index.query(
+            name=call.data.get(ATTR_NAME),
+            online=call.data.get(ATTR_ONLINE),
+            mac_prefix=call.data.get(ATTR_MAC_PREFIX),
+            sort_by=call.data.get(ATTR_SORT_BY),
+            descending=call.data[ATTR_DESCENDING],
+            limit=call.data[ATTR_LIMIT],
+            offset=call.data[ATTR_OFFSET],
+        )
+        """ Same count as the AP client sensors: wireless hosts with an IP """
+        host_count = coordinator.status.get("ap_host_count", {})
+
+        return {
+            "total": total,
+            "offset": call.data[ATTR_OFFSET],
+            "aps": [{**ap, "host_count": host_count.get(ap.get("entry_name"), 0)} for ap in aps],
+        }
+
+    async def async_get_history(call: ServiceCall) -> ServiceResponse:
+        history = get_coordinator(hass, call).history
+        resolution = call.data[ATTR_RESOLUTION]
+        names = set(call.data[ATTR_METRICS]) if ATTR_METRICS in call.data else None
+        limit = call.data.get(ATTR_LIMIT)
+
+        if resolution == "raw":
+            return {"resolution": resolution, "samples": history.raw(names, limit)}
+
+        return {"resolution": resolution, "buckets": history.rollups(resolution, names, limit)}
+
+    async def async_get_roaming_history(call: ServiceCall) -> ServiceResponse:
+        roaming = get_coordinator(hass, call).roaming
+        macs = call.data.get(ATTR_MAC) or sorted(roaming.clients)
+        summaries = [
+            {"mac": mac, **summary}
+            for mac in macs
+            if (summary := roaming.summary(mac)) is not None
+        ]
+
+        summaries.sort(key=lambda item: item["roam_count"], reverse=call.data[ATTR_DESCENDING])
+        page = summaries[call.data[ATTR_OFFSET]:call.data[ATTR_OFFSET] + call.data[ATTR_LIMIT]]
+        if call.data[ATTR_EVENTS]:
+            for item in page:
+                item["events"] = roaming.events(item["mac"])
+
+        return {
+            "total": len(summaries),
+            "offset": call.data[ATTR_OFFSET],
+            "clients": page,
+        }
+
+    async def async_set_ssids(call: ServiceCall) -> ServiceResponse:
+        coordinator = get_coordinator(hass, call)
+
+        states = {}
+        for item in call.data[ATTR_SSIDS]:
+            serv_id = coordinator.find_serv_id(item[ATTR_SSID_NAME])
+            if serv_id is None:
+                raise HomeAssistantError(f"Unknown SSID: {item[ATTR_SSID_NAME]}")
+            states[serv_id] = item[ATTR_ENABLE]
+
+        return {"confirmed": await coordinator.set_ssids(states)}
+
+    async def async_set_ssid_schedule(call: ServiceCall) -> None:
+        await get_coordinator(hass, call).ssid_schedule.async_set_rules(call.data[ATTR_RULES])
+
+    async def async_rolling_reboot_ap(call: ServiceCall) -> None:
+        coordinator = get_coordinator(hass, call)
+        names = call.data.get(ATTR_NAMES)
+        groups = call.data.get(ATTR_GROUPS)
+
+        id_list = [
+            ap["entry_id"] for ap in coordinator.status.get("ap_list") or []
+            if (names is None or ap.get("entry_name") in names)
+            and (groups is None or ap.get("group_id") in groups)
+        ]
+        if not id_list:
+            raise HomeAssistantError("No AP matches the given names / groups")
+
+        coordinator.start_rolling_reboot(
+            id_list,
+            call.data[ATTR_BATCH_SIZE],
+            call.data[ATTR_ONLINE_TIMEOUT],
+            call.data[ATTR_MAX_FAILURES],
+            call.data[ATTR_REBOOT_ROUTER],
+        )
+
+    hass.services.async_register(DOMAIN, SERVICE_PROFILE, async_profile, schema=PROFILE_SCHEMA)
+    hass.services.async_register(
+        DOMAIN, SERVICE_ROLLING_REBOOT_AP, async_rolling_reboot_ap, schema=ROLLING_REBOOT_AP_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_SET_SSIDS, async_set_ssids, schema=SET_SSIDS_SCHEMA, supports_response=SupportsResponse.OPTIONAL
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_SET_SSID_SCHEDULE, async_set_ssid_schedule, schema=SET_SSID_SCHEDULE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_GET_HOSTS, async_get_hosts, schema=GET_HOSTS_SCHEMA, supports_response=SupportsResponse.ONLY
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_GET_APS, async_get_aps, schema=GET_APS_SCHEMA, supports_response=SupportsResponse.ONLY
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_GET_ROAMING_HISTORY, async_get_roaming_history, schema=GET_ROAMING_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_GET_HISTORY, async_get_history, schema=GET_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY
+    )
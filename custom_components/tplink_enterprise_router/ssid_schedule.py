@@ -0,0 +1,82 @@
+"""Locally evaluated SSID on/off schedule."""
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+class SsidSchedule:
+    """Apply the rules due in the current minute as one batched SSID change.
+
+    A rule is {"ssids": [...], "enable": bool, "at": "HH:MM", "weekdays": ["mon", ...]},
+    later rules win when several target the same SSID at the same minute.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator) -> None:
+        self.hass = hass
+        self.coordinator = coordinator
+        self.rules: list[dict] = []
+        self._store = Store(hass, version=1, key=f"{DOMAIN}_{coordinator.entry.entry_id}_ssid_schedule")
+        self._unsub: CALLBACK_TYPE | None = None
+
+    async def async_load(self) -> None:
+        data = await self._store.async_load() or {}
+        self._set_rules(data.get("rules", []))
+
+    async def async_set_rules(self, rules: list[dict]) -> None:
+        self._set_rules(rules)
+        await self._store.async_save({"rules": self.rules})
+
+    @callback
+    def async_stop(self) -> None:
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    def _set_rules(self, rules: list[dict]) -> None:
+        self.rules = rules
+        self.async_stop()
+
+        """ Only wake up every minute when there is something to apply """
+        if rules:
+            self._unsub = async_track_time_change(self.hass, self._async_tick, second=0)
+
+    async def _async_tick(self, now: datetime) -> None:
+        at = now.strftime("%H:%M")
+        weekday = WEEKDAYS[now.weekday()]
+
+        states = {}
+        for rule in self.rules:
+            if rule["at"] != at or weekday not in rule.get("weekdays", WEEKDAYS):
+                continue
+
+            for ssid in rule["ssids"]:
+                serv_id = self.coordinator.find_serv_id(ssid)
+                if serv_id is None:
+                    _LOGGER.warning("Scheduled SSID %s not found on %s", ssid, self.coordinator.host)
+                    continue
+                states[serv_id] = rule["enable"]
+
+        """ Skip SSIDs already in the wanted state """
+        states = {
+            serv_id: enabled for serv_id, enabled in states.items()
+            if self.coordinator.status.get(f"__SSID_{serv_id}") != enabled
+        }
+        if not states:
+            return
+
+        _LOGGER.info("Applying SSID schedule on %s: %s", self.coordinator.host, states)
+        try:
+            await self.coordinator.set_ssids(states)
+        except Exception as e:
+            _LOGGER.error("Failed to apply SSID schedule on %s: %s", self.coordinator.host, e)
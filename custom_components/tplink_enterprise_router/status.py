@@ -0,0 +1,95 @@
+"""Versioned, read-only view of the router status with a small optimistic overlay."""
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Mapping
+from types import MappingProxyType
+from typing import Any
+
+_MISSING = object()
+
+
+class StatusOverlay:
+    """Local state shown before the router confirms it (switch toggles) or never sent by it (polling).
+
+    Never modified once built, every change returns the next overlay.
+    """
+
+    __slots__ = ("values", "version")
+
+    def __init__(self, values: Mapping | None = None, version: int = 0) -> None:
+        self.values: Mapping[str, Any] = MappingProxyType(dict(values or {}))
+        self.version = version
+
+    def set(self, values: dict) -> tuple[StatusOverlay, dict]:
+        """ Also returns what to hand to restore() to undo this change """
+        previous = {key: self.values.get(key, _MISSING) for key in values}
+        return StatusOverlay({**self.values, **values}, self.version + 1), previous
+
+    def restore(self, previous: dict) -> StatusOverlay:
+        values = dict(self.values)
+        for key, value in previous.items():
+            if value is _MISSING:
+                values.pop(key, None)
+            else:
+                values[key] = value
+        return StatusOverlay(values, self.version + 1)
+
+    def without(self, keys: Iterable[str]) -> StatusOverlay:
+        dropped = [key for key in keys if key in self.values]
+        if not dropped:
+            return self
+        return StatusOverlay({k: v for k, v in self.values.items() if k not in dropped}, self.version + 1)
+
+
+class StatusSnapshot(Mapping):
+    """Never modified once built, every update builds the next version.
+
+    The top level is a shallow copy, the section values (host lists, AP tables...) are shared
+    with the previous version when an update does not replace them. Router data and overlay are
+    versioned separately, `key` changes whenever either does.
+    """
+
+    __slots__ = ("_data", "version", "overlay")
+
+    def __init__(self, data: dict, version: int = 0, overlay: StatusOverlay | None = None) -> None:
+        self._data = data
+        self.version = version
+        self.overlay = overlay if overlay is not None else StatusOverlay()
+
+    @property
+    def data(self) -> Mapping[str, Any]:
+        """ Router data without the overlay """
+        return MappingProxyType(self._data)
+
+    @property
+    def key(self) -> tuple[int, int]:
+        return self.version, self.overlay.version
+
+    def with_data(self, data: dict) -> StatusSnapshot:
+        """ Optimistic values stay until the write that set them confirms them """
+        return StatusSnapshot({**self._data, **data}, self.version + 1, self.overlay)
+
+    def with_overlay(self, overlay: StatusOverlay) -> StatusSnapshot:
+        return StatusSnapshot(self._data, self.version, overlay)
+
+    def confirmed(self, keys: Iterable[str]) -> StatusSnapshot:
+        """ Values read back from the router replace the optimistic ones, local only keys stay """
+        return self.with_overlay(self.overlay.without(key for key in keys if key in self._data))
+
+    def __getitem__(self, key: str) -> Any:
+        overlay = self.overlay.values
+        if key in overlay:
+            return overlay[key]
+        return self._data[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.overlay.values or key in self._data
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._data
+        for key in self.overlay.values:
+            if key not in self._data:
+                yield key
+
+    def __len__(self) -> int:
+        return len(self._data) + sum(1 for key in self.overlay.values if key not in self._data)
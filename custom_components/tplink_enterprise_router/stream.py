@@ -0,0 +1,111 @@
+"""Incremental JSON decode that hands the records of large tables out one at a time."""
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from collections.abc import Callable
+from typing import Any
+
+""" A whole string (or the start of one cut by the chunk boundary) or a bracket outside of strings """
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*(")?|[\[\]{}]')
+_ARRAY_START = re.compile(r'\s*:\s*\[')
+_ARRAY_START_PARTIAL = re.compile(r'\s*(:\s*)?$')
+
+
+class StreamingRecordDecoder:
+    """Decode a JSON document fed chunk by chunk.
+
+    Every element of an array stored under one of the sink keys is decoded and handed to the sink
+    as soon as it is complete, the array itself is left empty in the returned document. Only the
+    document skeleton and the element being read are kept, whatever the size of the table.
+    """
+
+    def __init__(self, sinks: dict[str, Callable[[dict], None]], loads: Callable[[str], Any] = json.loads) -> None:
+        self._sinks = {f'"{key}"': sink for key, sink in sinks.items()}
+        self._loads = loads
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._skeleton: list[str] = []
+        self._skeleton_from = 0
+        self._sink: Callable[[dict], None] | None = None
+        self._depth = 0
+        self._record_start: int | None = None
+        self.records = 0
+
+    def feed(self, chunk: bytes) -> None:
+        self._buffer += self._text.decode(chunk)
+        self._scan()
+
+    def close(self) -> dict:
+        self._buffer += self._text.decode(b"", final=True)
+        self._scan()
+        if self._sink is not None:
+            raise json.JSONDecodeError("JSON document ends inside a streamed array", "", 0)
+
+        return self._loads("".join(self._skeleton) + self._buffer)
+
+    def _scan(self) -> None:
+        buffer = self._buffer
+        pos = self._pos
+
+        while True:
+            match = _TOKEN.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+
+            token = match.group()
+            if token[0] == '"' and match.group(1) is None:
+                """ Wait for the rest of the string """
+                pos = match.start()
+                break
+
+            if self._sink is None:
+                sink = self._sinks.get(token)
+                start = _ARRAY_START.match(buffer, match.end()) if sink is not None else None
+                if start is not None:
+                    """ Keep `"key": [` in the skeleton, the elements go to the sink """
+                    self._skeleton.append(buffer[self._skeleton_from:start.end()])
+                    self._sink = sink
+                    self._depth = 0
+                    pos = start.end()
+                elif sink is not None and _ARRAY_START_PARTIAL.match(buffer, match.end()):
+                    pos = match.start()
+                    break
+                else:
+                    pos = match.end()
+                continue
+
+            pos = match.end()
+            if token == "{" or token == "[":
+                if self._depth == 0:
+                    self._record_start = match.start()
+                self._depth += 1
+            elif token == "}" or token == "]":
+                if self._depth == 0:
+                    """ End of the streamed array, the closing bracket goes back to the skeleton """
+                    self._sink = None
+                    self._skeleton_from = match.start()
+                    continue
+
+                self._depth -= 1
+                if self._depth == 0:
+                    self._sink(self._loads(buffer[self._record_start:pos]))
+                    self._record_start = None
+                    self.records += 1
+
+        """ Drop what was consumed, keep the unfinished record or token """
+        if self._sink is None:
+            self._skeleton.append(buffer[self._skeleton_from:pos])
+            cut = pos
+            self._skeleton_from = 0
+        elif self._record_start is not None:
+            cut = self._record_start
+            self._record_start = 0
+        else:
+            cut = pos
+
+        self._buffer = buffer[cut:]
+        self._pos = pos - cut
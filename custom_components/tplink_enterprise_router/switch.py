@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import logging
 from collections.abc import Callable
 from dataclasses import dataclass
 from typing import Any
@@ -11,8 +12,12 @@ from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
+from .ap_entity import TPLinkEnterpriseRouterApEntity
 from .const import DOMAIN
 from .coordinator import TPLinkEnterpriseRouterCoordinator
+from .dynamic_entity import async_track_dynamic_entities
+
+_LOGGER = logging.getLogger(__name__)
 
 
 @dataclass
@@ -59,7 +64,6 @@ async def async_setup_entry(
         key = ssid.get("ssid")
         serv_id = ssid.get("serv_id")
         _property = f"__SSID_{serv_id}"
-        coordinator.status[_property] = ssid.get("enable") == 'on'
         switches.append(TPLinkEnterpriseRouterSwitchEntity(
             coordinator,
             TPLinkEnterpriseRouterSwitchEntityDescription(
@@ -75,6 +79,16 @@ async def async_setup_entry(
 
     async_add_entities(switches, False)
 
+    """ Per-AP LED switches """
+    if entry.data.get("enable_ap_entities", False):
+        async_track_dynamic_entities(
+            coordinator,
+            entry,
+            async_add_entities,
+            keys=lambda: coordinator.ap_index.macs,
+            factory=lambda mac: [TPLinkApLedSwitch(coordinator, mac)],
+        )
+
 
 class TPLinkEnterpriseRouterSwitchEntity(
     CoordinatorEntity[TPLinkEnterpriseRouterCoordinator], SwitchEntity
@@ -97,16 +111,57 @@ class TPLinkEnterpriseRouterSwitchEntity(
     @property
     def is_on(self) -> bool:
         """Return true if switch is on."""
-        return self.coordinator.status[self.entity_description.property]
+        return self.coordinator.status.get(self.entity_description.property)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        if self.coordinator.restored:
+            return {"restored": True}
+
+        return None
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the entity on."""
-        await self.entity_description.method(self.coordinator, self.entity_description.property, True)
-        self.coordinator.status[self.entity_description.property] = True
-        self.async_write_ha_state()
+        await self._async_set(True)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the entity off."""
-        await self.entity_description.method(self.coordinator, self.entity_description.property, False)
-        self.coordinator.status[self.entity_description.property] = False
+        await self._async_set(False)
+
+    async def _async_set(self, value: bool) -> None:
+        """ Show the new state right away, roll back if the write or its read back fails """
+        prop = self.entity_description.property
+        previous = self.coordinator.set_optimistic({prop: value})
+        self.async_write_ha_state()
+
+        try:
+            confirmed = await self.entity_description.method(self.coordinator, prop, value)
+        except Exception:
+            self.coordinator.restore_optimistic(previous)
+            self.async_write_ha_state()
+            raise
+
+        if confirmed is False:
+            _LOGGER.warning("%s was not confirmed by the router", self.entity_id)
+
+        """ Status now holds the value read back from the router """
+        self.coordinator.confirm_optimistic([prop])
         self.async_write_ha_state()
+
+
+class TPLinkApLedSwitch(TPLinkEnterpriseRouterApEntity, SwitchEntity):
+    _attr_icon = "mdi:led-on"
+    _attr_entity_category = EntityCategory.CONFIG
+
+    def __init__(self, coordinator: TPLinkEnterpriseRouterCoordinator, mac: str) -> None:
+        super().__init__(coordinator, mac, "switch", "ap_led")
+
+    @property
+    def is_on(self) -> bool:
+        return self.ap.get("led") == "on"
+
+    async def async_turn_on(self, **kwargs: Any) -> None:
+        await self.coordinator.set_ap_led(self.ap["entry_id"], "on")
+
+    async def async_turn_off(self, **kwargs: Any) -> None:
+        await self.coordinator.set_ap_led(self.ap["entry_id"], "off")
@@ -7,6 +7,12 @@ from homeassistant.helpers import translation
 
 from custom_components.tplink_enterprise_router.client import TPLinkEnterpriseRouterClient
 from custom_components.tplink_enterprise_router.const import DOMAIN
+from custom_components.tplink_enterprise_router.roaming import (
+    RoamingHistory,
+    KIND_CONNECTED,
+    KIND_DISCONNECTED,
+    KIND_ROAMED,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -100,8 +106,14 @@ class WebLoginEventMatcher(EventMatcher):
 
 
 class WirelessClientChangedEventMatcher(EventMatcher):
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, severities: list, _type: str,
+                 roaming: RoamingHistory | None = None):
+        super().__init__(hass, entry, severities, _type)
+        self.roaming = roaming
+
     def _process(self, data) -> None:
         super()._process(data)
+        self._record(data)
         final_data = None
         if self.type == "wireless_client_roamed":
             final_data = {
@@ -145,13 +157,27 @@ class WirelessClientChangedEventMatcher(EventMatcher):
         })
 
 
+    def _record(self, data) -> None:
+        """ Keep the transition in the per-client roaming history """
+        if self.roaming is None:
+            return
+
+        if self.type == "wireless_client_roamed":
+            self.roaming.record(data['client_mac'], data['timestamp'], KIND_ROAMED, data['current_ap_name'])
+        elif self.type == "wireless_client_connected":
+            self.roaming.record(data['client_mac'], data['timestamp'], KIND_CONNECTED, data['ap_name'])
+        elif self.type == "wireless_client_disconnected":
+            self.roaming.record(data['client_mac'], data['timestamp'], KIND_DISCONNECTED)
+
+
 class WirelessClientRoamedEventMatcher(WirelessClientChangedEventMatcher):
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, roaming: RoamingHistory | None = None):
         super().__init__(
             hass,
             entry,
             [1, 7],
-            "wireless_client_roamed"
+            "wireless_client_roamed",
+            roaming,
         )
 
     def match(self, message: str) -> bool:
@@ -177,12 +203,13 @@ class WirelessClientRoamedEventMatcher(WirelessClientChangedEventMatcher):
 
 
 class WirelessClientConnectedEventMatcher(WirelessClientChangedEventMatcher):
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, roaming: RoamingHistory | None = None):
         super().__init__(
             hass,
             entry,
             [1, 7],
-            "wireless_client_connected"
+            "wireless_client_connected",
+            roaming,
         )
 
     def match(self, message: str) -> bool:
@@ -206,12 +233,13 @@ class WirelessClientConnectedEventMatcher(WirelessClientChangedEventMatcher):
 
 
 class WirelessClientDisconnectedEventMatcher(WirelessClientChangedEventMatcher):
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, roaming: RoamingHistory | None = None):
         super().__init__(
             hass,
             entry,
             [1, 7],
-            "wireless_client_disconnected"
+            "wireless_client_disconnected",
+            roaming,
         )
 
     def match(self, message: str) -> bool:
@@ -250,13 +278,14 @@ class DHCPIpAssignedEventMatcher(EventMatcher):
 
 
 class SyslogTracker:
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, client: TPLinkEnterpriseRouterClient):
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, client: TPLinkEnterpriseRouterClient,
+                 roaming: RoamingHistory | None = None):
         self.matchers = [
             WebLoginEventMatcher(hass, entry),
             DHCPIpAssignedEventMatcher(hass, entry),
-            WirelessClientRoamedEventMatcher(hass, entry),
-            WirelessClientConnectedEventMatcher(hass, entry),
-            WirelessClientDisconnectedEventMatcher(hass, entry),
+            WirelessClientRoamedEventMatcher(hass, entry, roaming),
+            WirelessClientConnectedEventMatcher(hass, entry, roaming),
+            WirelessClientDisconnectedEventMatcher(hass, entry, roaming),
         ]
         self.hass = hass
         self.entry = entry
@@ -321,10 +350,14 @@ class SyslogTracker:
         json = await self.client.get_syslog(50)
         _messages = [list(d.values())[0] for d in json.get("syslog", [])]
 
+        new_messages = []
         for message in _messages:
             if self.last_log is not None and message == self.last_log:
                 break
+            new_messages.append(message)
 
+        """ The router lists newest first, handle oldest first so the transitions of a poll keep their order """
+        for message in reversed(new_messages):
             severity = int(message[1:2])
             await self.handle(
                 Event(
@@ -0,0 +1,78 @@
+"""Generate custom_components/tplink_enterprise_router/oui.csv from the IEEE MA-L registry.
+
+usage: python scripts/generate_oui.py [oui.csv | oui.txt | URL]
+
+Accepts the registry CSV (https://standards-oui.ieee.org/oui/oui.csv) or the text listing
+(https://standards-oui.ieee.org/oui/oui.txt), downloads the CSV when no source is given.
+Vendor names are compacted: legal suffixes dropped, whitespace collapsed.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import os
+import re
+import sys
+import urllib.request
+
+DEFAULT_SOURCE = "https://standards-oui.ieee.org/oui/oui.csv"
+OUTPUT = os.path.join(
+    os.path.dirname(__file__), "..", "custom_components", "tplink_enterprise_router", "oui.csv"
+)
+
+_TXT_LINE = re.compile(r"^([0-9A-F]{6})\s+\(base 16\)\s+(.*)$")
+_LEGAL_SUFFIX = re.compile(
+    r"[\s,.]+(co\.?,?\s*ltd|company\s+limited|corporation|corp|incorporated|inc|llc|ltd|limited|gmbh"
+    r"|s\.?a\.?s?|s\.?r\.?l|b\.?v|ag|a/s|ab|oy|pty|pte|plc|kg|co|l\.?p)\.?$",
+    re.IGNORECASE,
+)
+
+
+def compact(vendor: str) -> str:
+    vendor = " ".join(vendor.split())
+    """ Several suffixes can be stacked, e.g. "Foo Co., Ltd." or "Bar Pty Ltd" """
+    while True:
+        shorter = _LEGAL_SUFFIX.sub("", vendor).rstrip(" ,.")
+        if shorter == vendor or not shorter:
+            return vendor
+        vendor = shorter
+
+
+def parse(text: str) -> dict[str, str]:
+    rows = {}
+    if text.lstrip().startswith("Registry,"):
+        for row in csv.DictReader(io.StringIO(text)):
+            rows[row["Assignment"].upper()] = row["Organization Name"]
+    else:
+        for line in text.splitlines():
+            match = _TXT_LINE.match(line.strip())
+            if match:
+                rows[match.group(1)] = match.group(2)
+
+    return {prefix: compact(vendor) for prefix, vendor in rows.items() if vendor.strip()}
+
+
+def read_source(source: str) -> str:
+    if source.startswith(("http://", "https://")):
+        request = urllib.request.Request(source, headers={"User-Agent": "Mozilla/5.0"})
+        with urllib.request.urlopen(request) as response:
+            return response.read().decode("utf-8", errors="replace")
+
+    with open(source, encoding="utf-8", errors="replace") as file:
+        return file.read()
+
+
+def main() -> None:
+    rows = parse(read_source(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SOURCE))
+
+    with open(OUTPUT, "w", encoding="utf-8", newline="\n") as file:
+        file.write("# IEEE MA-L registry, generated by scripts/generate_oui.py, do not edit\n")
+        file.write("# One \"PREFIX,Vendor\" per line\n")
+        for prefix in sorted(rows):
+            file.write(f"{prefix},{rows[prefix]}\n")
+
+    print(f"Wrote {len(rows)} prefixes to {os.path.normpath(OUTPUT)}")
+
+
+if __name__ == "__main__":
+    main()